@@ -64,6 +64,7 @@ def run_migrations_online() -> None:
 
     """
     import bookkeeping.database as db
+    import bookkeeping.migration as migration
     db.init_database(os.environ.get('DATABASE_URL'), os.environ.get('DATABASE_SCHEMA'))
     target_metadata = db.metadata
 
@@ -74,6 +75,8 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # Table names are reflected once and then shared by all revisions of this run
+        migration.invalidate(connection)
         context.configure(
             connection=connection, target_metadata=target_metadata
         )
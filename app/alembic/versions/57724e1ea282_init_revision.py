@@ -5,11 +5,13 @@ Revises: faec5c0c55d3
 Create Date: 2022-02-24 20:09:16.862098
 
 """
-from typing import Any, List
+import functools
+from typing import List, Sequence, Tuple
 
 import sqlalchemy as sa
 from alembic import op
-from sqlalchemy.engine.reflection import Inspector
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
 
 # revision identifiers, used by Alembic.
 revision = "57724e1ea282"
@@ -17,133 +19,171 @@ down_revision = None
 branch_labels = None
 depends_on = None
 
-tables: List[Any] = []
 
+# The event tables are append-only logs, so they get 64-bit keys (BIGSERIAL on PostgreSQL). sqlite only
+# auto-increments "INTEGER PRIMARY KEY" columns, which are 64-bit there anyway.
+_event_id = sa.BigInteger().with_variant(sa.Integer(), "sqlite")
 
-def create_table(table_name, *params) -> None:
-    global tables
-    if not tables:
-        conn = op.get_bind()
-        inspector = Inspector.from_engine(conn)
-        tables = inspector.get_table_names()
 
-    if table_name in tables:
-        return
-    op.create_table(table_name, *params)
+def _tables(metadata: sa.MetaData) -> List[sa.Table]:
+    return [
+        sa.Table(
+            "dicom_files",
+            metadata,
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("time", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.Column("filename", sa.String(), nullable=True),
+            # Not unique: senders regularly transmit the same instance more than once
+            sa.Column("file_uid", sa.String(), nullable=True, index=True),
+            sa.Column("series_uid", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.Index("ix_dicom_files_series_time", "series_uid", "time"),
+        ),
+        # The tag columns are intentionally unbounded: PostgreSQL stores VARCHAR(n) and VARCHAR identically, so
+        # VR-sized lengths would not shrink the rows, but over-long or multi-valued tags from real-world devices
+        # would then make the insert fail and the series would be missing from the bookkeeper.
+        sa.Table(
+            "dicom_series",
+            metadata,
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("time", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.Column("series_uid", sa.String(), nullable=True),
+            sa.Column("tag_patientname", sa.String(), nullable=True),
+            sa.Column("tag_patientid", sa.String(), nullable=True),
+            sa.Column("tag_accessionnumber", sa.String(), nullable=True),
+            sa.Column("tag_seriesnumber", sa.String(), nullable=True),
+            sa.Column("tag_studyid", sa.String(), nullable=True),
+            sa.Column("tag_patientbirthdate", sa.String(), nullable=True),
+            sa.Column("tag_patientsex", sa.String(), nullable=True),
+            sa.Column("tag_acquisitiondate", sa.String(), nullable=True),
+            sa.Column("tag_acquisitiontime", sa.String(), nullable=True),
+            sa.Column("tag_modality", sa.String(), nullable=True),
+            sa.Column("tag_bodypartexamined", sa.String(), nullable=True),
+            sa.Column("tag_studydescription", sa.String(), nullable=True),
+            sa.Column("tag_seriesdescription", sa.String(), nullable=True),
+            sa.Column("tag_protocolname", sa.String(), nullable=True),
+            sa.Column("tag_codevalue", sa.String(), nullable=True),
+            sa.Column("tag_codemeaning", sa.String(), nullable=True),
+            sa.Column("tag_sequencename", sa.String(), nullable=True),
+            sa.Column("tag_scanningsequence", sa.String(), nullable=True),
+            sa.Column("tag_sequencevariant", sa.String(), nullable=True),
+            sa.Column("tag_slicethickness", sa.String(), nullable=True),
+            sa.Column("tag_contrastbolusagent", sa.String(), nullable=True),
+            sa.Column("tag_referringphysicianname", sa.String(), nullable=True),
+            sa.Column("tag_manufacturer", sa.String(), nullable=True),
+            sa.Column("tag_manufacturermodelname", sa.String(), nullable=True),
+            sa.Column("tag_magneticfieldstrength", sa.String(), nullable=True),
+            sa.Column("tag_deviceserialnumber", sa.String(), nullable=True),
+            sa.Column("tag_softwareversions", sa.String(), nullable=True),
+            sa.Column("tag_stationname", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("series_uid"),
+        ),
+        sa.Table(
+            "dicom_series_map",
+            metadata,
+            sa.Column("id_file", sa.Integer(), nullable=False),
+            sa.Column("id_series", sa.Integer(), nullable=True, index=True),
+            sa.PrimaryKeyConstraint("id_file"),
+        ),
+        sa.Table(
+            "file_events",
+            metadata,
+            sa.Column("id", _event_id, autoincrement=True, nullable=False),
+            sa.Column("time", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.Column("dicom_file", sa.Integer(), nullable=True, index=True),
+            sa.Column("event", sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            # File events are stamped by the database when they are inserted, so their time follows the insert order
+            # and a BRIN index stays a few pages large on PostgreSQL where a btree would grow with every row. Series
+            # events carry the time of the sending client and keep a btree index. sqlite ignores the option and
+            # creates a regular index.
+            sa.Index("ix_file_events_time", "time", postgresql_using="brin"),
+        ),
+        sa.Table(
+            "mercure_events",
+            metadata,
+            sa.Column("id", _event_id, autoincrement=True, nullable=False),
+            sa.Column("time", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.Column("sender", sa.String(), nullable=True),
+            sa.Column("event", sa.String(), nullable=True),
+            sa.Column("severity", sa.Integer(), nullable=True),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        ),
+        sa.Table(
+            "series_events",
+            metadata,
+            sa.Column("id", _event_id, autoincrement=True, nullable=False),
+            sa.Column("time", sa.DateTime(), server_default=sa.func.now(), nullable=False, index=True),
+            sa.Column("sender", sa.String(), nullable=True),
+            sa.Column("event", sa.String(), nullable=True),
+            sa.Column("series_uid", sa.String(), nullable=True, index=True),
+            sa.Column("file_count", sa.Integer(), nullable=True),
+            sa.Column("target", sa.String(), nullable=True),
+            sa.Column("info", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        ),
+        sa.Table(
+            "series_sequence_data",
+            metadata,
+            sa.Column("uid", sa.String(), nullable=False),
+            sa.Column("data", sa.JSON().with_variant(postgresql.JSONB(astext_type=sa.Text()), "postgresql"), nullable=True),
+            sa.PrimaryKeyConstraint("uid"),
+        ),
+        sa.Table(
+            "webgui_events",
+            metadata,
+            sa.Column("id", _event_id, autoincrement=True, nullable=False),
+            sa.Column("time", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+            sa.Column("sender", sa.String(), nullable=True),
+            sa.Column("event", sa.String(), nullable=True),
+            sa.Column("user", sa.String(), nullable=True),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        ),
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def _statements(dialect_name: str) -> Tuple[str, ...]:
+    """Compiles the DDL of the init tables once per dialect. Indexes are created only after all tables exist."""
+    dialect = sa.engine.url.make_url(f"{dialect_name}://").get_dialect()()
+    tables = _tables(sa.MetaData())
+    create_tables = [
+        str(CreateTable(table).compile(dialect=dialect)).strip().replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1)
+        for table in tables
+    ]
+    create_indexes = [
+        str(CreateIndex(index).compile(dialect=dialect)).strip().replace("INDEX", "INDEX IF NOT EXISTS", 1)
+        for table in tables
+        for index in sorted(table.indexes, key=lambda index: index.name)
+    ]
+    return tuple(create_tables + create_indexes)
+
+
+def _execute(dialect, statements: Sequence[str]) -> None:
+    if dialect.name == "sqlite":
+        # sqlite3 refuses to run more than one statement per execute()
+        for statement in statements:
+            op.execute(statement)
+    else:
+        # One round-trip, executed inside the transaction alembic opens for transactional DDL
+        op.execute(";\n".join(statements))
 
 
 def upgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    create_table(
-        "dicom_files",
-        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
-        sa.Column("time", sa.DateTime(), nullable=True),
-        sa.Column("filename", sa.String(), nullable=True),
-        sa.Column("file_uid", sa.String(), nullable=True),
-        sa.Column("series_uid", sa.String(), nullable=True),
-        sa.PrimaryKeyConstraint("id"),
-    )
-
-    create_table(
-        "dicom_series",
-        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
-        sa.Column("time", sa.DateTime(), nullable=True),
-        sa.Column("series_uid", sa.String(), nullable=True),
-        sa.Column("tag_patientname", sa.String(), nullable=True),
-        sa.Column("tag_patientid", sa.String(), nullable=True),
-        sa.Column("tag_accessionnumber", sa.String(), nullable=True),
-        sa.Column("tag_seriesnumber", sa.String(), nullable=True),
-        sa.Column("tag_studyid", sa.String(), nullable=True),
-        sa.Column("tag_patientbirthdate", sa.String(), nullable=True),
-        sa.Column("tag_patientsex", sa.String(), nullable=True),
-        sa.Column("tag_acquisitiondate", sa.String(), nullable=True),
-        sa.Column("tag_acquisitiontime", sa.String(), nullable=True),
-        sa.Column("tag_modality", sa.String(), nullable=True),
-        sa.Column("tag_bodypartexamined", sa.String(), nullable=True),
-        sa.Column("tag_studydescription", sa.String(), nullable=True),
-        sa.Column("tag_seriesdescription", sa.String(), nullable=True),
-        sa.Column("tag_protocolname", sa.String(), nullable=True),
-        sa.Column("tag_codevalue", sa.String(), nullable=True),
-        sa.Column("tag_codemeaning", sa.String(), nullable=True),
-        sa.Column("tag_sequencename", sa.String(), nullable=True),
-        sa.Column("tag_scanningsequence", sa.String(), nullable=True),
-        sa.Column("tag_sequencevariant", sa.String(), nullable=True),
-        sa.Column("tag_slicethickness", sa.String(), nullable=True),
-        sa.Column("tag_contrastbolusagent", sa.String(), nullable=True),
-        sa.Column("tag_referringphysicianname", sa.String(), nullable=True),
-        sa.Column("tag_manufacturer", sa.String(), nullable=True),
-        sa.Column("tag_manufacturermodelname", sa.String(), nullable=True),
-        sa.Column("tag_magneticfieldstrength", sa.String(), nullable=True),
-        sa.Column("tag_deviceserialnumber", sa.String(), nullable=True),
-        sa.Column("tag_softwareversions", sa.String(), nullable=True),
-        sa.Column("tag_stationname", sa.String(), nullable=True),
-        sa.PrimaryKeyConstraint("id"),
-        sa.UniqueConstraint("series_uid"),
-    )
-
-    create_table(
-        "dicom_series_map",
-        sa.Column("id_file", sa.Integer(), nullable=False),
-        sa.Column("id_series", sa.Integer(), nullable=True),
-        sa.PrimaryKeyConstraint("id_file"),
-    )
-    create_table(
-        "file_events",
-        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
-        sa.Column("time", sa.DateTime(), nullable=True),
-        sa.Column("dicom_file", sa.Integer(), nullable=True),
-        sa.Column("event", sa.Integer(), nullable=True),
-        sa.PrimaryKeyConstraint("id"),
-    )
-    create_table(
-        "mercure_events",
-        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
-        sa.Column("time", sa.DateTime(), nullable=True),
-        sa.Column("sender", sa.String(), nullable=True),
-        sa.Column("event", sa.String(), nullable=True),
-        sa.Column("severity", sa.Integer(), nullable=True),
-        sa.Column("description", sa.String(), nullable=True),
-        sa.PrimaryKeyConstraint("id"),
-    )
-    create_table(
-        "series_events",
-        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
-        sa.Column("time", sa.DateTime(), nullable=True),
-        sa.Column("sender", sa.String(), nullable=True),
-        sa.Column("event", sa.String(), nullable=True),
-        sa.Column("series_uid", sa.String(), nullable=True),
-        sa.Column("file_count", sa.Integer(), nullable=True),
-        sa.Column("target", sa.String(), nullable=True),
-        sa.Column("info", sa.String(), nullable=True),
-        sa.PrimaryKeyConstraint("id"),
-    )
-    create_table(
-        "series_sequence_data",
-        sa.Column("uid", sa.String(), nullable=False),
-        sa.Column("data", sa.JSON(), nullable=True),
-        sa.PrimaryKeyConstraint("uid"),
-    )
-    create_table(
-        "webgui_events",
-        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
-        sa.Column("time", sa.DateTime(), nullable=True),
-        sa.Column("sender", sa.String(), nullable=True),
-        sa.Column("event", sa.String(), nullable=True),
-        sa.Column("user", sa.String(), nullable=True),
-        sa.Column("description", sa.String(), nullable=True),
-        sa.PrimaryKeyConstraint("id"),
-    )
-    # ### end Alembic commands ###
+    conn = op.get_bind()
+    dialect = conn.dialect
+    if dialect.name not in ("postgresql", "sqlite"):
+        metadata = sa.MetaData()
+        _tables(metadata)
+        metadata.create_all(conn, checkfirst=True)
+        return
+
+    _execute(dialect, _statements(dialect.name))
 
 
 def downgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_table("webgui_events")
-    op.drop_table("series_sequence_data")
-    op.drop_table("series_events")
-    op.drop_table("mercure_events")
-    op.drop_table("file_events")
-    op.drop_table("dicom_series_map")
-    op.drop_table("dicom_series")
-    op.drop_table("dicom_files")
-    # ### end Alembic commands ###
+    dialect = op.get_bind().dialect
+    _execute(dialect, [f"DROP TABLE IF EXISTS {table.name}" for table in reversed(_tables(sa.MetaData()))])
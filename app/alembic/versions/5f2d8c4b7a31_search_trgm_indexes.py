@@ -0,0 +1,51 @@
+"""trigram indexes for the task search
+
+Revision ID: 5f2d8c4b7a31
+Revises: 9c38f4f15a29
+Create Date: 2025-02-18 11:42:07.218514
+
+"""
+import logging
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5f2d8c4b7a31"
+down_revision = "9c38f4f15a29"
+branch_labels = None
+depends_on = None
+
+# Expressions searched with ilike by the find_task endpoint of the bookkeeper
+trgm_indexes = {
+    "ix_dicom_series_accessionnumber_trgm": ("dicom_series", "tag_accessionnumber"),
+    "ix_dicom_series_patientid_trgm": ("dicom_series", "tag_patientid"),
+    "ix_dicom_series_patientname_trgm": ("dicom_series", "tag_patientname"),
+    "ix_tasks_applied_rule_trgm": ("tasks", "(data->'info'->>'applied_rule')"),
+}
+
+
+def upgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == "sqlite":
+        return
+
+    # pg_trgm is a trusted extension, but older servers only allow superusers to create it. The search still
+    # works without the indexes, so a missing privilege must not block the migration.
+    try:
+        with connection.begin_nested():
+            connection.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except sa.exc.DBAPIError as e:
+        logging.getLogger("alembic").warning(f"Unable to create the pg_trgm extension, skipping the search indexes: {e}")
+        return
+
+    for index_name, (table_name, expression) in trgm_indexes.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} USING gin ({expression} gin_trgm_ops)")
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == "sqlite":
+        return
+    for index_name in trgm_indexes:
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
@@ -0,0 +1,39 @@
+"""indexes for the task lookups
+
+Revision ID: b84e1f0c9d62
+Revises: 5f2d8c4b7a31
+Create Date: 2025-02-20 09:15:42.603117
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b84e1f0c9d62"
+down_revision = "5f2d8c4b7a31"
+branch_labels = None
+depends_on = None
+
+tasks_indexes = {
+    # Time windows in which the patient and study tasks collect their child tasks
+    "ix_tasks_time": "(time)",
+    # Pages of the top level tasks (parent_id IS NULL), which are listed by time
+    "ix_tasks_parent_id_time": "(parent_id, time DESC)",
+    # Subtasks of a task. Most tasks have no parent, so these are left out of the index.
+    "ix_tasks_subtasks": "(parent_id) WHERE parent_id IS NOT NULL",
+}
+
+
+def upgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == "sqlite":
+        return
+    for index_name, definition in tasks_indexes.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON tasks {definition}")
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == "sqlite":
+        return
+    for index_name in tasks_indexes:
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
@@ -0,0 +1,31 @@
+"""indexes on the task ids of the task records
+
+Revision ID: c3a7d25e8f14
+Revises: b84e1f0c9d62
+Create Date: 2025-02-21 14:03:51.882406
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c3a7d25e8f14"
+down_revision = "b84e1f0c9d62"
+branch_labels = None
+depends_on = None
+
+# Records that the query endpoints of the bookkeeper look up by task id
+task_id_indexes = {
+    "ix_processor_logs_task_id": ("processor_logs", "task_id"),
+    "ix_processor_outputs_task_id": ("processor_outputs", "task_id"),
+    "ix_task_events_task_time": ("task_events", "task_id, time"),
+}
+
+
+def upgrade():
+    for index_name, (table_name, columns) in task_id_indexes.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})")
+
+
+def downgrade():
+    for index_name in task_id_indexes:
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
@@ -0,0 +1,40 @@
+"""generated columns for the MRN and scope of the tasks
+
+Revision ID: e1b6c4f82a57
+Revises: c3a7d25e8f14
+Create Date: 2025-02-25 16:48:30.117264
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e1b6c4f82a57"
+down_revision = "c3a7d25e8f14"
+branch_labels = None
+depends_on = None
+
+# Values of the task info that the queries of the bookkeeper compare for every row. Stored as columns, they do not
+# need to be extracted from the JSON data at query time. Adding a stored generated column rewrites the whole tasks
+# table under an ACCESS EXCLUSIVE lock, so the bookkeeper cannot read or write tasks while this revision runs.
+task_info_columns = {
+    "mrn": "data->'info'->>'mrn'",
+    "uid_type": "data->'info'->>'uid_type'",
+}
+
+
+def upgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == "sqlite":
+        return
+    for column_name, expression in task_info_columns.items():
+        op.execute(f"ALTER TABLE tasks ADD COLUMN IF NOT EXISTS {column_name} TEXT GENERATED ALWAYS AS ({expression}) STORED")
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_tasks_{column_name} ON tasks ({column_name})")
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == "sqlite":
+        return
+    for column_name in task_info_columns:
+        op.execute(f"DROP INDEX IF EXISTS ix_tasks_{column_name}")
+        op.execute(f"ALTER TABLE tasks DROP COLUMN IF EXISTS {column_name}")
@@ -5,11 +5,9 @@ Revises: 31a5db4f993e
 Create Date: 2022-06-28 17:18:27.570620
 
 """
-from typing import Any, List
-
 import sqlalchemy as sa
 from alembic import op
-from sqlalchemy.engine.reflection import Inspector
+from bookkeeping.migration import add_table, get_table_names
 
 # revision identifiers, used by Alembic.
 revision = "e90a5c7c6211"
@@ -17,19 +15,13 @@ down_revision = "31a5db4f993e"
 branch_labels = None
 depends_on = None
 
-tables: List[Any] = []
-
 
 def create_table(table_name, *params) -> None:
-    global tables
-    if not tables:
-        conn = op.get_bind()
-        inspector = Inspector.from_engine(conn)
-        tables = inspector.get_table_names()
-
-    if table_name in tables:
+    conn = op.get_bind()
+    if table_name in get_table_names(conn):
         return
     op.create_table(table_name, *params)
+    add_table(conn, table_name)
 
 
 def upgrade():
@@ -5,12 +5,10 @@ Revises: 57724e1ea282
 Create Date: 2022-02-24 20:11:56.419148
 
 """
-from typing import Any, List
-
 import sqlalchemy as sa
 from alembic import op
+from bookkeeping.migration import add_table, get_table_names, remove_table
 from sqlalchemy.dialects import postgresql
-from sqlalchemy.engine.reflection import Inspector
 
 # revision identifiers, used by Alembic.
 revision = "ee4575e2cf40"
@@ -19,18 +17,12 @@ branch_labels = None
 depends_on = None
 
 
-tables: List[Any] = []
-
-
 def create_table(table_name, *params) -> None:
-    global tables
-    if not tables:
-        conn = op.get_bind()
-        inspector = Inspector.from_engine(conn)
-        tables = inspector.get_table_names()
-    if table_name in tables:
+    conn = op.get_bind()
+    if table_name in get_table_names(conn):
         return
     op.create_table(table_name, *params)
+    add_table(conn, table_name)
 
 
 def upgrade():
@@ -57,6 +49,8 @@ def upgrade():
     # op.add_column("dicom_series", sa.Column("study_uid", sa.String(), nullable=True))
 
     op.rename_table("series_events", "task_events")
+    remove_table(connection, "series_events")
+    add_table(connection, "task_events")
     op.add_column("task_events", sa.Column("task_id", sa.String(), nullable=True))
     # op.drop_column('task_events', 'series_uid')
     if dialect.name == "sqlite":
@@ -21,6 +21,7 @@ import hupper
 import uvicorn
 from alembic import command
 from alembic.config import Config
+from bookkeeping.query import output_folder_cache, task_info_cache
 # App-specific includes
 from common import config
 from common.constants import mercure_defs
@@ -257,6 +258,7 @@ async def register_task(request) -> JSONResponse:
     )
 
     await db.database.execute(query)
+    task_info_cache.pop(payload["id"])
     return JSONResponse({"ok": ""})
 
 
@@ -292,6 +294,7 @@ async def update_task(request) -> JSONResponse:
         )
     )
     await db.database.execute(query)
+    task_info_cache.pop(payload["id"])
     return JSONResponse({"ok": ""})
 
 
@@ -324,7 +327,7 @@ async def test_end(request) -> JSONResponse:
     id = payload["id"]
     status = payload.get("status", "")
 
-    query = db.tests_table.update(db.tests_table.c.id == id).values(time_end=datetime.datetime.now(), status=status)
+    query = db.tests_table.update().where(db.tests_table.c.id == id).values(time_end=datetime.datetime.now(), status=status)
     await db.database.execute(query)
     return JSONResponse({"ok": ""})
 
@@ -430,6 +433,8 @@ async def delete_task(request) -> JSONResponse:
         # Delete the task itself
         query = db.tasks_table.delete().where(db.tasks_table.c.id == task_id)
         result = await db.database.execute(query)
+        task_info_cache.pop(task_id)
+        output_folder_cache.pop(task_id)
 
         logger.info(f"Deleted task {task_id} and all related records")
         return JSONResponse({"ok": "", "deleted": task_id})
@@ -449,9 +454,13 @@ async def lifespan(app):
     db.init_database()
     migrate_database()
     await db.database.connect()
+    if db.database.url.dialect == "postgresql":
+        # The pool opens its connections on connect; fail early if the database cannot be queried with them
+        await db.database.execute("SELECT 1")
     assert db.metadata
     bk_config.set_api_key()
     yield
+    query.shutdown_dicom_pool()
     await db.database.disconnect()
 
 
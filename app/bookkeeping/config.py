@@ -22,10 +22,14 @@ BOOKKEEPER_HOST: str
 DATABASE_SCHEMA: Optional[str]
 API_KEY: Optional[str]
 DEBUG_MODE: bool
+DATABASE_POOL_MIN_SIZE: int = 5
+DATABASE_POOL_MAX_SIZE: int = 20
+DATABASE_STATEMENT_CACHE_SIZE: int = 1024
 
 
 def read_bookkeeper_config() -> Config:
     global bookkeeper_config, BOOKKEEPER_PORT, BOOKKEEPER_HOST, DATABASE_URL, DATABASE_SCHEMA, DEBUG_MODE, API_KEY
+    global DATABASE_POOL_MIN_SIZE, DATABASE_POOL_MAX_SIZE, DATABASE_STATEMENT_CACHE_SIZE
     bookkeeper_config = Config(config_filename)
 
     BOOKKEEPER_PORT = bookkeeper_config("PORT", cast=int, default=8080)
@@ -33,6 +37,9 @@ def read_bookkeeper_config() -> Config:
     DATABASE_URL = bookkeeper_config("DATABASE_URL", default="postgresql://mercure@localhost")
     DATABASE_SCHEMA = bookkeeper_config("DATABASE_SCHEMA", default=None)
     DEBUG_MODE = bookkeeper_config("DEBUG", cast=bool, default=False)
+    DATABASE_POOL_MIN_SIZE = bookkeeper_config("DATABASE_POOL_MIN_SIZE", cast=int, default=5)
+    DATABASE_POOL_MAX_SIZE = bookkeeper_config("DATABASE_POOL_MAX_SIZE", cast=int, default=20)
+    DATABASE_STATEMENT_CACHE_SIZE = bookkeeper_config("DATABASE_STATEMENT_CACHE_SIZE", cast=int, default=1024)
     API_KEY = None
     return bookkeeper_config
 
@@ -9,6 +9,8 @@ import bookkeeping.config as bk_config
 import common.monitor as monitor
 import databases
 # Standard python includes
+from typing import Any, Dict
+
 import sqlalchemy
 from common import config
 from sqlalchemy.sql import func
@@ -37,12 +39,28 @@ processor_logs_table: sqlalchemy.Table
 processor_outputs_table: sqlalchemy.Table
 
 
+def get_pool_options(url: str) -> Dict[str, Any]:
+    """
+    Returns the options for the asyncpg connection pool. Keeping a few connections open avoids the connection
+    handshake on every request, and the larger statement cache keeps the prepared plans of the bookkeeper queries.
+    JIT compilation is disabled, as it only adds overhead for the short queries used here.
+    """
+    if databases.DatabaseURL(url).dialect != "postgresql":
+        return {}
+    return dict(
+        min_size=bk_config.DATABASE_POOL_MIN_SIZE,
+        max_size=max(bk_config.DATABASE_POOL_MAX_SIZE, bk_config.DATABASE_POOL_MIN_SIZE),
+        statement_cache_size=bk_config.DATABASE_STATEMENT_CACHE_SIZE,
+        server_settings={"jit": "off"},
+    )
+
+
 def init_database(url=None, schema=None) -> databases.Database:
     global database, metadata, mercure_events, webgui_events, dicom_files, dicom_series, task_events
     global file_events, dicom_series_map, series_sequence_data, tasks_table, tests_table
     global processor_logs_table, processor_outputs_table
 
-    database = databases.Database(url or bk_config.DATABASE_URL)
+    database = databases.Database(url or bk_config.DATABASE_URL, **get_pool_options(url or bk_config.DATABASE_URL))
     metadata = sqlalchemy.MetaData(schema=(schema or bk_config.DATABASE_SCHEMA))
     # SQLite does not support JSONB natively, so we use TEXT instead
     JSONB = sqlalchemy.types.Text() if 'sqlite://' in (url or bk_config.DATABASE_URL) else sqlalchemy.dialects.postgresql.JSONB
@@ -50,7 +68,7 @@ def init_database(url=None, schema=None) -> databases.Database:
     mercure_events = sqlalchemy.Table(
         "mercure_events",
         metadata,
-        sqlalchemy.Column("id", sqlalchemy.Integer, primary_key=True, autoincrement=True),
+        sqlalchemy.Column("id", sqlalchemy.BigInteger, primary_key=True, autoincrement=True),
         sqlalchemy.Column("time", sqlalchemy.DateTime),
         sqlalchemy.Column("sender", sqlalchemy.String, default="Unknown"),
         sqlalchemy.Column("event", sqlalchemy.String, default=monitor.m_events.UNKNOWN),
@@ -61,7 +79,7 @@ def init_database(url=None, schema=None) -> databases.Database:
     webgui_events = sqlalchemy.Table(
         "webgui_events",
         metadata,
-        sqlalchemy.Column("id", sqlalchemy.Integer, primary_key=True, autoincrement=True),
+        sqlalchemy.Column("id", sqlalchemy.BigInteger, primary_key=True, autoincrement=True),
         sqlalchemy.Column("time", sqlalchemy.DateTime),
         sqlalchemy.Column("sender", sqlalchemy.String, default="Unknown"),
         sqlalchemy.Column("event", sqlalchemy.String, default=monitor.w_events.UNKNOWN),
@@ -119,7 +137,7 @@ def init_database(url=None, schema=None) -> databases.Database:
     task_events = sqlalchemy.Table(
         "task_events",
         metadata,
-        sqlalchemy.Column("id", sqlalchemy.Integer, primary_key=True, autoincrement=True),
+        sqlalchemy.Column("id", sqlalchemy.BigInteger, primary_key=True, autoincrement=True),
         sqlalchemy.Column("task_id", sqlalchemy.String, sqlalchemy.ForeignKey("tasks.id"), nullable=True),
         sqlalchemy.Column("time", sqlalchemy.DateTime),
         sqlalchemy.Column("sender", sqlalchemy.String, default="Unknown"),
@@ -134,7 +152,7 @@ def init_database(url=None, schema=None) -> databases.Database:
     file_events = sqlalchemy.Table(
         "file_events",
         metadata,
-        sqlalchemy.Column("id", sqlalchemy.Integer, primary_key=True, autoincrement=True),
+        sqlalchemy.Column("id", sqlalchemy.BigInteger, primary_key=True, autoincrement=True),
         sqlalchemy.Column("time", sqlalchemy.DateTime),
         sqlalchemy.Column("dicom_file", sqlalchemy.Integer),
         sqlalchemy.Column("event", sqlalchemy.Integer),
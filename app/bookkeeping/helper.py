@@ -4,31 +4,136 @@ helper.py
 Helper functions for the bookkeeper service.
 """
 
+import collections
 import datetime
-import json
+import decimal
+import time
 # Standard python includes
-from typing import Any
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Generic, Hashable, Iterable, Optional, Tuple, TypeVar, Union
 
+import orjson
 # Starlette-related includes
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, StreamingResponse
 
 
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime.datetime):
-            return obj.strftime("%Y-%m-%d %H:%M:%S")
-        elif isinstance(obj, datetime.date):
-            return obj.strftime("%Y-%m-%d")
-        else:
-            try:
-                dict_ = dict(obj)
-            except TypeError:
-                pass
-            else:
-                return dict_
-            return super(CustomJSONEncoder, self).default(obj)
+def json_default(obj: Any) -> Any:
+    """Converts the values that orjson cannot serialize by itself. Dates are sent in the format used by the webgui."""
+    if isinstance(obj, datetime.datetime):
+        return obj.strftime("%Y-%m-%d %H:%M:%S")
+    elif isinstance(obj, datetime.date):
+        return obj.strftime("%Y-%m-%d")
+    elif isinstance(obj, decimal.Decimal):
+        return float(obj)
+    else:
+        try:
+            return dict(obj)
+        except (TypeError, ValueError):
+            raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dump_json(content: Any) -> bytes:
+    # Dates are passed to json_default instead of being serialized as ISO 8601 by orjson
+    return orjson.dumps(content, default=json_default,
+                        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
 
 
 class CustomJSONResponse(JSONResponse):
     def render(self, content: Any) -> bytes:
-        return json.dumps(content, cls=CustomJSONEncoder).encode("utf-8")
+        return dump_json(content)
+
+
+class CustomStreamingJSONResponse(StreamingResponse):
+    """
+    Sends a list of rows as JSON while the rows are being serialized, so that the complete document never has to be
+    held in memory. The rows can be given as (async) iterable. If an envelope is given, the list is sent as its "data"
+    entry, otherwise the list itself is the document. The other entries of the envelope are sent after the rows, so
+    they can still be updated while the rows are produced.
+    """
+
+    # Rows are collected into chunks of this size before they are sent
+    chunk_size = 65536
+
+    def __init__(self, rows: Union[Iterable[Any], AsyncIterable[Any]], envelope: Optional[Dict] = None,
+                 status_code: int = 200) -> None:
+        super().__init__(self.render_rows(rows, envelope), status_code=status_code, media_type="application/json")
+
+    @classmethod
+    async def start(cls, rows: AsyncIterable[Any], envelope: Optional[Dict] = None,
+                    status_code: int = 200) -> "CustomStreamingJSONResponse":
+        """
+        Reads the first row before the response is created. Database queries only run when their first row is
+        requested, so errors of the query are raised by the endpoint and answered with an error status, instead of
+        ending a response that has already been started with status 200.
+        """
+        iterator = rows.__aiter__()
+        try:
+            first_row = await iterator.__anext__()
+        except StopAsyncIteration:
+            return cls([], envelope, status_code)
+
+        async def all_rows() -> AsyncIterator[Any]:
+            yield first_row
+            async for row in iterator:
+                yield row
+
+        return cls(all_rows(), envelope, status_code)
+
+    async def render_rows(self, rows: Union[Iterable[Any], AsyncIterable[Any]],
+                          envelope: Optional[Dict]) -> AsyncIterator[bytes]:
+        buffer = bytearray(b"[" if envelope is None else b'{"data":[')
+        separator = b""
+        async for row in self.iterate(rows):
+            buffer += separator
+            buffer += dump_json(row)
+            separator = b","
+            if len(buffer) >= self.chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += b"]"
+        if envelope is not None:
+            entries = dump_json({key: value for key, value in envelope.items() if key != "data"})
+            buffer += b"," + entries[1:] if len(entries) > 2 else b"}"
+        yield bytes(buffer)
+
+    @staticmethod
+    async def iterate(rows: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+        if isinstance(rows, AsyncIterable):
+            async for row in rows:
+                yield row
+        else:
+            for row in rows:
+                yield row
+
+
+T = TypeVar("T")
+
+
+class TTLCache(Generic[T]):
+    """
+    Small LRU cache whose entries expire after a fixed time. Once maxsize entries are stored, the least recently used
+    entry is dropped.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: "collections.OrderedDict[Hashable, Tuple[float, T]]" = collections.OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[T]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: T) -> None:
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self.entries.pop(key, None)
@@ -0,0 +1,36 @@
+"""
+migration.py
+============
+Helper functions shared by the alembic revision scripts of the bookkeeper database.
+"""
+
+# Standard python includes
+from typing import Any, Dict, Set
+
+from sqlalchemy.engine.reflection import Inspector
+
+# Table names per database, so that a full "upgrade head" reflects the schema only once
+_table_names: Dict[Any, Set[str]] = {}
+
+
+def get_table_names(conn) -> Set[str]:
+    """Returns the names of the existing tables. The schema is reflected on first use and cached afterwards."""
+    key = conn.engine.url
+    if key not in _table_names:
+        _table_names[key] = set(Inspector.from_engine(conn).get_table_names())
+    return _table_names[key]
+
+
+def add_table(conn, table_name: str) -> None:
+    """Records a table that has been created by a revision script."""
+    get_table_names(conn).add(table_name)
+
+
+def remove_table(conn, table_name: str) -> None:
+    """Records a table that has been dropped or renamed by a revision script."""
+    get_table_names(conn).discard(table_name)
+
+
+def invalidate(conn) -> None:
+    """Forgets the cached table names, forcing a new reflection on the next lookup."""
+    _table_names.pop(conn.engine.url, None)
@@ -4,37 +4,75 @@ query.py
 Entry functions of the bookkeeper for querying processing information.
 """
 
-import ast
+import asyncio
+import base64
+import concurrent.futures
 import datetime
+import functools
 import json
+import multiprocessing
+import os
+import re
 from pathlib import Path
+from types import MappingProxyType
 # Standard python includes
-from typing import Dict
+from typing import Any, AsyncIterator, Callable, Dict, FrozenSet, List, Mapping, Optional, Tuple, TypeVar
 
 # App-specific includes
 import bookkeeping.database as db
+import dateutil.tz
 import pydicom
 import sqlalchemy
-from bookkeeping.helper import CustomJSONResponse, json
+from bookkeeping.helper import CustomJSONResponse, CustomStreamingJSONResponse, TTLCache
 from common import config
 from decoRouter import Router as decoRouter
 from pydicom.datadict import keyword_for_tag
+from pydicom.multival import MultiValue
+from pydicom.valuerep import PersonName
 from sqlalchemy import select
+from sqlalchemy.sql.elements import TextClause
 # Starlette-related includes
 from starlette.applications import Starlette
 from starlette.authentication import requires
-from starlette.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
 
 router = decoRouter()
 logger = config.get_logger()
+
+T = TypeVar("T")
+# Conversion of the task event times into the local time zone. The time zones are passed as bound parameters.
 tz_conversion = ""
+tz_conversion_params: Dict[str, str] = {}
 
 
 def set_timezone_conversion() -> None:
-    global tz_conversion
+    global tz_conversion, tz_conversion_params
     tz_conversion = ""
-    if config.mercure.server_time != config.mercure.local_time:
-        tz_conversion = f" AT time zone '{config.mercure.server_time}' at time zone '{config.mercure.local_time}' "
+    tz_conversion_params = {}
+    if config.mercure.server_time == config.mercure.local_time:
+        return
+    for time_zone in (config.mercure.server_time, config.mercure.local_time):
+        if dateutil.tz.gettz(time_zone) is None:
+            logger.error(f"Unknown time zone {time_zone}, times of task events will not be converted")
+            return
+    tz_conversion = " AT time zone :server_time at time zone :local_time "
+    tz_conversion_params = {"server_time": config.mercure.server_time, "local_time": config.mercure.local_time}
+
+
+async def fetch_records(query: str, *args: Any) -> List[Any]:
+    """
+    Runs a query directly on the asyncpg connection of the database and returns the asyncpg records, which skips the
+    result processing of databases and SQLAlchemy. The query uses the $1, $2, ... placeholders of asyncpg. Only for
+    results without JSON columns, which asyncpg returns as strings. Other database backends run the query through
+    databases, with the placeholders turned into bound parameters.
+    """
+    if db.database.url.dialect != "postgresql" or db.database.url.driver not in ("", "asyncpg"):
+        statement = sqlalchemy.text(re.sub(r"\$(\d+)", r":p\1", query))
+        return await db.database.fetch_all(statement.bindparams(**{f"p{i}": arg for i, arg in enumerate(args, 1)}))
+    async with db.database.connection() as connection:
+        records: List[Any] = await connection.raw_connection.fetch(query, *args)
+    return records
 
 ###################################################################################
 # Query endpoints
@@ -46,17 +84,12 @@ def set_timezone_conversion() -> None:
 async def get_series(request) -> JSONResponse:
     """Endpoint for retrieving series in the database."""
     series_uid = request.query_params.get("series_uid", "")
-    query = db.dicom_series.select()
+    # Only the columns shown in the webgui are selected, the remaining tags are not needed here
+    query = "SELECT id, time, series_uid, tag_seriesdescription, tag_modality FROM dicom_series"
     if series_uid:
-        query = query.where(db.dicom_series.c.series_uid == series_uid)
-
-    result = await db.database.fetch_all(query)
-    series = [dict(row) for row in result]
-
-    for i, line in enumerate(series):
-        series[i] = {
-            k: line[k] for k in line if k in ("id", "time", "series_uid", "tag_seriesdescription", "tag_modality")
-        }
+        series = await fetch_records(query + " WHERE series_uid = $1", series_uid)
+    else:
+        series = await fetch_records(query)
     return CustomJSONResponse(series)
 
 
@@ -64,27 +97,19 @@ async def get_series(request) -> JSONResponse:
 @requires("authenticated")
 async def get_tasks(request) -> JSONResponse:
     """Endpoint for retrieving tasks in the database."""
-    query = (
-        sqlalchemy.select(
-            db.tasks_table.c.id, db.tasks_table.c.time, db.dicom_series.c.tag_seriesdescription, db.dicom_series.c.tag_modality
-        )
-        .where(db.tasks_table.c.parent_id.is_(None))  # only show tasks without parents
-        .join(
-            db.dicom_series,
-            # sqlalchemy.or_(
-            # (dicom_series.c.study_uid == tasks_table.c.study_uid),
-            (db.dicom_series.c.series_uid == db.tasks_table.c.series_uid),
-            # ),
-            isouter=True,
-        )
-    )
+    query = """
+        SELECT tasks.id, tasks.time, dicom_series.tag_seriesdescription, dicom_series.tag_modality
+        FROM tasks
+        LEFT OUTER JOIN dicom_series ON dicom_series.series_uid = tasks.series_uid
+        WHERE tasks.parent_id IS NULL  -- only show tasks without parents
+        """
     # query = sqlalchemy.text(
     #     """ select tasks.id as task_id, tasks.time, tasks.series_uid, tasks.study_uid,
     #         "tag_seriesdescription", "tag_modality" from tasks
     #         join dicom_series on tasks.study_uid = dicom_series.study_uid
     #           or tasks.series_uid = dicom_series.series_uid """
     # )
-    results = await db.database.fetch_all(query)
+    results = await fetch_records(query)
     return CustomJSONResponse(results)
 
 
@@ -105,61 +130,100 @@ async def get_test_task(request) -> JSONResponse:
     #     )
     #     .where(dicom_series.c.tag_seriesdescription == "self_test_series " + request.query_params.get("id", ""))
     # )
-    result_rows = await db.database.fetch_all(query)
-    results = [dict(row) for row in result_rows]
-    for k in results:
-        if not k["time_end"]:
-            if k["time_begin"] < datetime.datetime.now() - datetime.timedelta(minutes=10):
-                k["status"] = "failed"
+    # Tests that have not ended within 10 minutes are shown as failed
+    failed_before = datetime.datetime.now() - datetime.timedelta(minutes=10)
+    results = [
+        dict(row, status="failed") if not row["time_end"] and row["time_begin"] < failed_before else row
+        for row in await db.database.fetch_all(query)
+    ]
     return CustomJSONResponse(results)
 
 
 @router.get("/task-events")
 @requires("authenticated")
-async def get_task_events(request) -> JSONResponse:
+async def get_task_events(request) -> Response:
     """Endpoint for getting all events related to one task."""
 
     task_id = request.query_params.get("task_id", "")
-    subtask_query = sqlalchemy.select(db.tasks_table.c.id).where(db.tasks_table.c.parent_id == task_id)
-
-    # Note: The space at the end is needed for the case that there are no subtasks
-    subtask_ids_str = ""
-    for row in await db.database.fetch_all(subtask_query):
-        subtask_ids_str += f"'{row[0]}',"
-
-    subtask_ids_filter = ""
-    if subtask_ids_str:
-        subtask_ids_filter = "or task_events.task_id in (" + subtask_ids_str[:-1] + ")"
-
-    # Get all the task_events from task `task_id` or any of its subtasks
-    # subtask_ids = [row[0] for row in await database.fetch_all(subtask_query)]
-    # query = (
-    #     task_events.select()
-    #     .order_by(task_events.c.task_id, task_events.c.time)
-    #     .where(sqlalchemy.or_(task_events.c.task_id == task_id, task_events.c.task_id.in_(subtask_ids)))
-    # )
 
+    # Get all the task_events from task `task_id` or any of its subtasks. The task ids are collected first, so that
+    # the events of each task can be read from the task_id index.
     query_string = f"""select *, time {tz_conversion} as local_time from task_events
-        where task_events.task_id = '{task_id}' {subtask_ids_filter}
+        where task_events.task_id in (
+            select cast(:task_id as varchar) union all select id from tasks where parent_id = :task_id
+        )
         order by task_events.task_id, task_events.time
         """
-    # print("SQL Query = " + query_string)
-    query = sqlalchemy.text(query_string)
-
-    results = await db.database.fetch_all(query)
-    return CustomJSONResponse(results)
+    # The events are sent while they are read from the database, so that large tasks are not held in memory
+    return await CustomStreamingJSONResponse.start(
+        db.database.iterate(query_string, {"task_id": task_id, **tz_conversion_params})
+    )
 
 
 @router.get("/dicom-files")
 @requires("authenticated")
-async def get_dicom_files(request) -> JSONResponse:
+async def get_dicom_files(request) -> Response:
     """Endpoint for getting all events related to one series."""
     series_uid = request.query_params.get("series_uid", "")
     query = db.dicom_files.select().order_by(db.dicom_files.c.time)
     if series_uid:
         query = query.where(db.dicom_files.c.series_uid == series_uid)
-    results = await db.database.fetch_all(query)
-    return CustomJSONResponse(results)
+    return await CustomStreamingJSONResponse.start(db.database.iterate(query))
+
+
+def with_parent_task_fallback(rows_query: str) -> str:
+    """
+    Extends a query for the rows of one task, given with a {task_id} placeholder, so that the rows of the patient or
+    study task that the task has been processed with are returned if nothing has been recorded for the task itself.
+    That parent task has the same MRN and was started between 10 minutes before and 5 minutes after the task, with
+    patient tasks taking precedence over study tasks. Both lookups run as one statement on the database server.
+    """
+    return f"""
+    WITH direct AS (
+        {rows_query.format(task_id=":task_id")}
+    ),
+    target AS (
+        SELECT
+            t.id,
+            t.uid_type,
+            COALESCE(t.mrn, ds.tag_patientid) as mrn,
+            t.time
+        FROM tasks t
+        LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
+        WHERE t.id = :task_id
+    ),
+    parent AS (
+        SELECT t.id
+        FROM target, tasks t
+        LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
+        WHERE NOT EXISTS (SELECT 1 FROM direct)
+          AND target.uid_type IS DISTINCT FROM 'patient'
+          AND target.mrn != ''
+          AND t.parent_id IS NULL
+          AND t.id != target.id
+          AND COALESCE(t.mrn, ds.tag_patientid) = target.mrn
+          AND t.uid_type IN ('patient', 'study')
+          AND t.time BETWEEN target.time - interval '10 minutes' AND target.time + interval '5 minutes'
+        ORDER BY
+            CASE WHEN t.uid_type = 'patient' THEN 0 ELSE 1 END,
+            t.time DESC
+        LIMIT 1
+    )
+    SELECT * FROM direct
+    UNION ALL
+    {rows_query.format(task_id="(SELECT id FROM parent)")}
+    ORDER BY id
+    """
+
+
+# Logs of a task and its subtasks, falling back to the logs of the parent patient/study task
+task_process_logs_query = sqlalchemy.text(with_parent_task_fallback(
+    "SELECT * FROM processor_logs WHERE task_id IN (SELECT id FROM tasks WHERE id = {task_id} OR parent_id = {task_id})"
+))
+# Results of a task, falling back to the results of the parent patient/study task
+task_process_results_query = sqlalchemy.text(with_parent_task_fallback(
+    "SELECT * FROM processor_outputs WHERE task_id = {task_id}"
+))
 
 
 @router.get("/task_process_logs")
@@ -172,90 +236,23 @@ async def get_task_process_logs(request) -> JSONResponse:
     """
     task_id = request.query_params.get("task_id", "")
 
-    async def get_logs_for_task(tid: str) -> list:
-        subtask_query = (
-            db.tasks_table.select()
-            .order_by(db.tasks_table.c.id)
-            .where(sqlalchemy.or_(db.tasks_table.c.id == tid, db.tasks_table.c.parent_id == tid))
-        )
-        subtasks = await db.database.fetch_all(subtask_query)
-        subtask_ids = [row[0] for row in subtasks]
-
-        query = (db.processor_logs_table.select(db.processor_logs_table.c.task_id.in_(subtask_ids))
-                                        .order_by(db.processor_logs_table.c.id))
-        results = [dict(r) for r in await db.database.fetch_all(query)]
-        for result in results:
-            if result["logs"] is None:
-                if logs_folder := config.mercure.processing_logs.logs_file_store:
-                    try:
-                        result["logs"] = (
-                            Path(logs_folder) / result["task_id"] / f"{result['module_name']}.{result['id']}.txt"
-                        ).read_text(encoding="utf-8")
-                    except FileNotFoundError:
-                        result["logs"] = None
-        return results
-
-    # First try direct lookup
-    results = await get_logs_for_task(task_id)
-    if results:
-        return CustomJSONResponse(results)
-
-    # No results - try to find parent task with same MRN
-    mrn_query = """
-    SELECT
-        t.data->'info'->>'uid_type' as uid_type,
-        COALESCE(t.data->'info'->>'mrn', ds.tag_patientid) as mrn,
-        t.time
-    FROM tasks t
-    LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
-    WHERE t.id = :task_id
-    """
-    task_result = await db.database.fetch_one(mrn_query, {"task_id": task_id})
-
-    if not task_result:
-        return CustomJSONResponse([])
-
-    task_dict = dict(task_result)
-    uid_type = task_dict.get("uid_type")
-    mrn = task_dict.get("mrn")
-    task_time = task_dict.get("time")
-
-    # If already a patient task, no parent to find
-    if uid_type == "patient" or not mrn:
-        return CustomJSONResponse([])
-
-    # Find parent task (patient or study) with same MRN within time window
-    if isinstance(task_time, str):
-        task_time = datetime.datetime.fromisoformat(task_time.replace('Z', '+00:00'))
-    if task_time is None:
-        return CustomJSONResponse([])
-    time_start = task_time - datetime.timedelta(minutes=10)
-    time_end = task_time + datetime.timedelta(minutes=5)
+    query = task_process_logs_query.bindparams(task_id=task_id).columns(*db.processor_logs_table.c)
+    results = [dict(r) for r in await db.database.fetch_all(query)]
 
-    parent_query = """
-    SELECT t.id as task_id
-    FROM tasks t
-    LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
-    WHERE t.parent_id IS NULL
-      AND t.id != :task_id
-      AND COALESCE(t.data->'info'->>'mrn', ds.tag_patientid) = :mrn
-      AND t.data->'info'->>'uid_type' IN ('patient', 'study')
-      AND t.time BETWEEN :time_start AND :time_end
-    ORDER BY
-        CASE WHEN t.data->'info'->>'uid_type' = 'patient' THEN 0 ELSE 1 END,
-        t.time DESC
-    LIMIT 1
-    """
-    parent_result = await db.database.fetch_one(parent_query, {
-        "task_id": task_id,
-        "mrn": mrn,
-        "time_start": time_start,
-        "time_end": time_end
-    })
+    # Logs that are not stored in the database are read from the logs folder. The files are read in worker
+    # threads, so that the event loop is not blocked, with a limit on the number of files that are open at once
+    if logs_folder := config.mercure.processing_logs.logs_file_store:
+        open_files = asyncio.Semaphore(16)
 
-    if parent_result:
-        results = await get_logs_for_task(parent_result["task_id"])
+        async def read_logs(result: dict) -> None:
+            log_file = Path(logs_folder) / result["task_id"] / f"{result['module_name']}.{result['id']}.txt"
+            async with open_files:
+                try:
+                    result["logs"] = await run_in_threadpool(log_file.read_text, encoding="utf-8")
+                except FileNotFoundError:
+                    result["logs"] = None
 
+        await asyncio.gather(*(read_logs(result) for result in results if result["logs"] is None))
     return CustomJSONResponse(results)
 
 
@@ -269,139 +266,32 @@ async def get_task_process_results(request) -> JSONResponse:
     """
     task_id = request.query_params.get("task_id", "")
 
-    # First try direct lookup
-    query = (db.processor_outputs_table.select()
-                                       .where(db.processor_outputs_table.c.task_id == task_id)
-                                       .order_by(db.processor_outputs_table.c.id))
-    results = [dict(r) for r in await db.database.fetch_all(query)]
-
-    if results:
-        return CustomJSONResponse(results)
-
-    # No results - try to find parent task with same MRN
-    mrn_query = """
-    SELECT
-        t.data->'info'->>'uid_type' as uid_type,
-        COALESCE(t.data->'info'->>'mrn', ds.tag_patientid) as mrn,
-        t.time
-    FROM tasks t
-    LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
-    WHERE t.id = :task_id
-    """
-    task_result = await db.database.fetch_one(mrn_query, {"task_id": task_id})
-
-    if not task_result:
-        return CustomJSONResponse([])
-
-    task_dict = dict(task_result)
-    uid_type = task_dict.get("uid_type")
-    mrn = task_dict.get("mrn")
-    task_time = task_dict.get("time")
-
-    # If already a patient task, no parent to find
-    if uid_type == "patient" or not mrn:
-        return CustomJSONResponse([])
-
-    # Find parent task (patient or study) with same MRN within time window
-    if isinstance(task_time, str):
-        task_time = datetime.datetime.fromisoformat(task_time.replace('Z', '+00:00'))
-    if task_time is None:
-        return CustomJSONResponse([])
-    time_start = task_time - datetime.timedelta(minutes=10)
-    time_end = task_time + datetime.timedelta(minutes=5)
-
-    parent_query = """
-    SELECT t.id as task_id
-    FROM tasks t
-    LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
-    WHERE t.parent_id IS NULL
-      AND t.id != :task_id
-      AND COALESCE(t.data->'info'->>'mrn', ds.tag_patientid) = :mrn
-      AND t.data->'info'->>'uid_type' IN ('patient', 'study')
-      AND t.time BETWEEN :time_start AND :time_end
-    ORDER BY
-        CASE WHEN t.data->'info'->>'uid_type' = 'patient' THEN 0 ELSE 1 END,
-        t.time DESC
-    LIMIT 1
-    """
-    parent_result = await db.database.fetch_one(parent_query, {
-        "task_id": task_id,
-        "mrn": mrn,
-        "time_start": time_start,
-        "time_end": time_end
-    })
-
-    if parent_result:
-        parent_id = parent_result["task_id"]
-        query = (db.processor_outputs_table.select()
-                                           .where(db.processor_outputs_table.c.task_id == parent_id)
-                                           .order_by(db.processor_outputs_table.c.id))
-        results = [dict(r) for r in await db.database.fetch_all(query)]
-
+    query = task_process_results_query.bindparams(task_id=task_id).columns(*db.processor_outputs_table.c)
+    results = await db.database.fetch_all(query)
     return CustomJSONResponse(results)
 
 
-@router.get("/find_task")
-@requires("authenticated")
-async def find_task(request) -> JSONResponse:
-    # Extract DataTables parameters
-    draw = int(request.query_params.get("draw", "1"))
-    start = int(request.query_params.get("start", "0"))
-    length = int(request.query_params.get("length", "10"))
-    search_term = request.query_params.get("search[value]", "")  # Global search value
-    group_by = request.query_params.get("group_by", "")  # Filter by scope: patient, study, series, or empty for grouped
-
-    # Extract ordering information
-    order_column_index = request.query_params.get("order[0][column]", "6")  # Default to time column (index 6)
-    order_direction = request.query_params.get("order[0][dir]", "desc")  # Default to descending
-
-    # Map datatable column index to database column
-    # Column layout: 0=Expand, 1=ACC, 2=MRN, 3=UID, 4=Scope, 5=Rule, 6=Time, 7=Files, 8=ID
-    column_mapping = {
-        "1": "tag_accessionnumber",  # ACC
-        "2": "tag_patientid",        # MRN
-        "4": "parent_tasks.data->'info'->>'uid_type'",  # Scope
-        "6": "parent_tasks.time",    # Time
-        "8": "parent_tasks.id"       # ID
-    }
-
-    order_column = column_mapping.get(order_column_index, column_mapping["6"])
-    order_sql = f"{order_column} {order_direction.upper()}, parent_tasks.id {order_direction.upper()}"
-
-    having_term = (f"""HAVING (
-                    (tag_accessionnumber ilike :search_term || '%')
-                    or (tag_patientid ilike :search_term || '%')
-                    or (tag_patientname ilike '%' || :search_term || '%')
-                    or bool_or(child_tasks.data->'info'->>'applied_rule'::text ilike '%' || :search_term || '%')
-                    or bool_or(
-                        array(
-                            select jsonb_object_keys(
-                                                    child_tasks.data->'info'->'triggered_rules'
-                                                    )
-                        )::text ilike '%' || :search_term || '%'
-                        )
-                    or (parent_tasks.data->'info'->>'applied_rule'::text ilike '%' || :search_term || '%')
-                    or (
-                        array(
-                            select jsonb_object_keys(
-                                                    parent_tasks.data->'info'->'triggered_rules'
-                                                    )
-                        )::text ilike '%' || :search_term || '%'
-                        )
-                   )
-                   """) if search_term else ""
-
-    # Build scope filter based on group_by parameter
-    scope_filter_term = ""
-    if group_by == "patient":
-        scope_filter_term = "AND parent_tasks.data->'info'->>'uid_type' = 'patient'"
-    elif group_by == "study":
-        scope_filter_term = "AND parent_tasks.data->'info'->>'uid_type' = 'study'"
-    elif group_by == "series":
-        # Series view: show series that were either:
-        # 1. Standalone series jobs with applied_rule, OR
-        # 2. Series registrations that have an associated patient/study task (same MRN, within time window)
-        scope_filter_term = """AND (parent_tasks.data->'info'->>'uid_type' = 'series' OR parent_tasks.data->'info'->>'uid_type' IS NULL)
+# Upper bound for the page size of find_task, which also applies if DataTables asks for all rows (length -1)
+find_task_max_length = 10000
+
+# Map datatable column index to database column
+# Column layout: 0=Expand, 1=ACC, 2=MRN, 3=UID, 4=Scope, 5=Rule, 6=Time, 7=Files, 8=ID
+find_task_order_columns: Mapping[str, str] = MappingProxyType({
+    "1": "tag_accessionnumber",  # ACC
+    "2": "tag_patientid",        # MRN
+    "4": "parent_tasks.uid_type",  # Scope
+    "6": "parent_tasks.time",    # Time
+    "8": "parent_tasks.id"       # ID
+})
+
+# Scope filters of the find_task views, by group_by parameter
+find_task_scope_filters: Mapping[str, str] = MappingProxyType({
+    "patient": "AND parent_tasks.uid_type = 'patient'",
+    "study": "AND parent_tasks.uid_type = 'study'",
+    # Series view: show series that were either:
+    # 1. Standalone series jobs with applied_rule, OR
+    # 2. Series registrations that have an associated patient/study task (same MRN, within time window)
+    "series": """AND (parent_tasks.uid_type = 'series' OR parent_tasks.uid_type IS NULL)
             AND (
                 -- Standalone series jobs with applied_rule
                 parent_tasks.data->'info'->>'applied_rule' IS NOT NULL
@@ -410,232 +300,294 @@ async def find_task(request) -> JSONResponse:
                 EXISTS (
                     SELECT 1 FROM tasks pt
                     LEFT JOIN dicom_series pds ON pds.series_uid = pt.series_uid
-                    WHERE pt.data->'info'->>'uid_type' IN ('patient', 'study')
-                      AND COALESCE(pt.data->'info'->>'mrn', pds.tag_patientid) = COALESCE(parent_tasks.data->'info'->>'mrn', tag_patientid)
+                    WHERE pt.uid_type IN ('patient', 'study')
+                      AND COALESCE(pt.mrn, pds.tag_patientid) = COALESCE(parent_tasks.mrn, tag_patientid)
                       AND parent_tasks.time BETWEEN pt.time - interval '5 minutes' AND pt.time
                 )
+            )""",
+})
+
+# The search predicates do not depend on any aggregate, so they are applied before the grouping, where the
+# trigram indexes on the DICOM tags and the applied rule can be used
+find_task_search_filter = """
+            AND (
+                tag_accessionnumber ILIKE :search_term || '%'
+                OR tag_patientid ILIKE :search_term || '%'
+                OR tag_patientname ILIKE '%' || :search_term || '%'
+                OR parent_tasks.data->'info'->>'applied_rule' ILIKE '%' || :search_term || '%'
+                OR array(
+                    SELECT jsonb_object_keys(parent_tasks.data->'info'->'triggered_rules')
+                )::text ILIKE '%' || :search_term || '%'
+                OR EXISTS (
+                    SELECT 1 FROM tasks child_tasks
+                    WHERE child_tasks.parent_id = parent_tasks.id
+                      AND (
+                          child_tasks.data->'info'->>'applied_rule' ILIKE '%' || :search_term || '%'
+                          OR array(
+                              SELECT jsonb_object_keys(child_tasks.data->'info'->'triggered_rules')
+                          )::text ILIKE '%' || :search_term || '%'
+                      )
+                )
             )"""
 
-    # Count query (for recordsTotal and recordsFiltered)
+# Types of the bound parameters of the find_task queries
+find_task_param_types: Mapping[str, Any] = MappingProxyType({
+    "search_term": sqlalchemy.String,
+    "start": sqlalchemy.Integer,
+    "length": sqlalchemy.Integer,
+    "cursor_time": sqlalchemy.DateTime,
+    "cursor_id": sqlalchemy.String,
+})
+
+
+def typed_text(statement: str, param_types: Mapping[str, Any]) -> TextClause:
+    """Returns the text clause of the statement, with the types of the bound parameters that it uses."""
+    return sqlalchemy.text(statement).bindparams(
+        *[sqlalchemy.bindparam(name, type_=type_) for name, type_ in param_types.items() if f":{name}" in statement]
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def build_find_task_queries(group_by: str, order_column_index: str, order_direction: str, has_search: bool,
+                            has_cursor: bool = False) -> Tuple[TextClause, TextClause]:
+    """
+    Returns the count and data queries for the find_task endpoint. The statements only depend on the view and the
+    ordering, while the search term and the paging values are passed as bound parameters. The query text therefore
+    stays identical across requests, so that the database driver can reuse its prepared statements, and the text
+    clauses are only built once. With has_cursor, the page starts after the task given by :cursor_time and
+    :cursor_id, which requires ordering by time.
+    """
+    # Only known columns and directions end up in the statement, anything else falls back to the defaults
+    order_column = find_task_order_columns.get(order_column_index, find_task_order_columns["6"])
+    order_direction = "ASC" if order_direction == "asc" else "DESC"
+    order_sql = f"{order_column} {order_direction}, parent_tasks.id {order_direction}"
+
+    search_filter_term = find_task_search_filter if has_search else ""
+    cursor_filter_term = ""
+    if has_cursor:
+        cursor_filter_term = (f"AND (parent_tasks.time, parent_tasks.id) {'>' if order_direction == 'ASC' else '<'} "
+                              "(:cursor_time, :cursor_id)")
+    scope_filter_term = find_task_scope_filters.get(group_by, "")
+
     # When group_by is set, show only tasks of that scope; otherwise show hierarchical view
     if group_by:
         # Show all tasks of the specified scope
-        count_query_string = f"""
-        with base as (
-           SELECT
-            parent_tasks.id AS task_id,
-            COALESCE(parent_tasks.data->'info'->>'acc', tag_accessionnumber) AS acc,
-            COALESCE(parent_tasks.data->'info'->>'mrn', tag_patientid) AS mrn,
-            COALESCE(parent_tasks.data->'info'->>'patient_name', tag_patientname) AS name
-           FROM
-            tasks as parent_tasks
-            LEFT JOIN dicom_series ON dicom_series.series_uid = parent_tasks.series_uid
-           WHERE parent_tasks.parent_id is null
-             {scope_filter_term}
-           GROUP BY 1,2,3,4
-           {having_term}
-        )
-        SELECT
-            COUNT(DISTINCT task_id) as total_count
-        FROM base
-        """
+        view_filter_term = scope_filter_term
     else:
         # Hierarchical view: show patient tasks OR study tasks (if no patient exists)
-        count_query_string = f"""
-        with base as (
-           SELECT
-            parent_tasks.id AS task_id,
-            COALESCE(parent_tasks.data->'info'->>'acc', tag_accessionnumber) AS acc,
-            COALESCE(parent_tasks.data->'info'->>'mrn', tag_patientid) AS mrn,
-            COALESCE(parent_tasks.data->'info'->>'patient_name', tag_patientname) AS name
-           FROM
+        view_filter_term = """AND (
+              -- Show patient tasks
+              parent_tasks.uid_type = 'patient'
+              OR (
+                  -- Show study tasks only if no patient task exists with same MRN
+                  parent_tasks.uid_type = 'study'
+                  AND NOT EXISTS (
+                      SELECT 1 FROM tasks pt
+                      WHERE pt.uid_type = 'patient'
+                        AND pt.mrn = COALESCE(parent_tasks.mrn, tag_patientid)
+                  )
+              )
+          )"""
+
+    # Count query (for recordsTotal and recordsFiltered). As the series UIDs of dicom_series are unique, the join
+    # yields one row per task, so neither of the queries needs to group the rows.
+    count_query_string = f"""
+    SELECT
+        COUNT(*) as total_count
+    FROM
+        tasks as parent_tasks
+        LEFT JOIN dicom_series ON dicom_series.series_uid = parent_tasks.series_uid
+    WHERE parent_tasks.parent_id is null
+      {view_filter_term}
+      {search_filter_term}
+    """
+
+    # Main data query with pagination. The page of tasks is selected first, so that the child tasks only need to be
+    # collected for the tasks that are actually returned, and a page ordered by time can be read from the
+    # (parent_id, time) index. The page keeps the name parent_tasks, so that the ordering applies to the outer query
+    # as well.
+    query_string = f"""
+    WITH parent_tasks AS (
+        SELECT
+            parent_tasks.id, parent_tasks.study_uid, parent_tasks.series_uid, parent_tasks.time, parent_tasks.data,
+            parent_tasks.uid_type, parent_tasks.mrn,
+            tag_accessionnumber, tag_patientid, tag_patientname, dicom_series.tag_seriesdescription, dicom_series.tag_modality
+        FROM
             tasks as parent_tasks
             LEFT JOIN dicom_series ON dicom_series.series_uid = parent_tasks.series_uid
-           WHERE parent_tasks.parent_id is null
-             AND (
-                 -- Show patient tasks
-                 parent_tasks.data->'info'->>'uid_type' = 'patient'
-                 OR (
-                     -- Show study tasks only if no patient task exists with same MRN
-                     parent_tasks.data->'info'->>'uid_type' = 'study'
-                     AND NOT EXISTS (
-                         SELECT 1 FROM tasks pt
-                         WHERE pt.data->'info'->>'uid_type' = 'patient'
-                           AND pt.data->'info'->>'mrn' = COALESCE(parent_tasks.data->'info'->>'mrn', tag_patientid)
-                     )
-                 )
-             )
-           GROUP BY 1,2,3,4
-           {having_term}
-        )
-        SELECT
-            COUNT(DISTINCT task_id) as total_count
-        FROM base
-        """
-
-    # Main data query with pagination
-    # When group_by is set, show only tasks of that scope; otherwise show hierarchical view
-    base_select = f"""
+        WHERE parent_tasks.parent_id is null
+          {view_filter_term}
+          {search_filter_term}
+          {cursor_filter_term}
+        ORDER BY
+            {order_sql}
+        LIMIT :length OFFSET :start
+    )
     SELECT
         COALESCE(parent_tasks.data->'info'->>'acc', tag_accessionnumber, '') AS acc,
-        COALESCE(parent_tasks.data->'info'->>'mrn', tag_patientid, '') AS mrn,
+        COALESCE(parent_tasks.mrn, tag_patientid, '') AS mrn,
         COALESCE(parent_tasks.data->'info'->>'patient_name', tag_patientname, '') AS name,
         parent_tasks.id AS task_id,
         -- For patient/study tasks, aggregate study/series UIDs from child tasks
         CASE
-            WHEN parent_tasks.data->'info'->>'uid_type' = 'patient' THEN (
-                SELECT STRING_AGG(DISTINCT t.study_uid, ', ')
-                FROM tasks t
-                LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
-                WHERE t.id != parent_tasks.id
-                  AND COALESCE(t.data->'info'->>'mrn', ds.tag_patientid) = parent_tasks.data->'info'->>'mrn'
-                  AND t.time BETWEEN parent_tasks.time - interval '5 minutes' AND parent_tasks.time
-                  AND t.study_uid IS NOT NULL
-            )
+            WHEN parent_tasks.uid_type = 'patient' THEN patient_children.study_uids
             ELSE parent_tasks.study_uid
         END AS study_uid,
         CASE
-            WHEN parent_tasks.data->'info'->>'uid_type' = 'patient' THEN (
-                SELECT STRING_AGG(DISTINCT t.series_uid, ', ')
-                FROM tasks t
-                LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
-                WHERE t.id != parent_tasks.id
-                  AND COALESCE(t.data->'info'->>'mrn', ds.tag_patientid) = parent_tasks.data->'info'->>'mrn'
-                  AND t.time BETWEEN parent_tasks.time - interval '5 minutes' AND parent_tasks.time
-                  AND t.series_uid IS NOT NULL
-            )
-            WHEN parent_tasks.data->'info'->>'uid_type' = 'study' THEN (
-                SELECT STRING_AGG(DISTINCT t.series_uid, ', ')
-                FROM tasks t
-                WHERE t.id != parent_tasks.id
-                  AND t.time BETWEEN parent_tasks.time - interval '3 seconds' AND parent_tasks.time + interval '3 seconds'
-                  AND t.series_uid IS NOT NULL
-            )
+            WHEN parent_tasks.uid_type = 'patient' THEN patient_children.series_uids
+            WHEN parent_tasks.uid_type = 'study' THEN study_children.series_uids
             ELSE parent_tasks.series_uid
         END AS series_uid,
-        parent_tasks.data->'info'->>'uid_type' AS scope,
+        parent_tasks.uid_type AS scope,
         parent_tasks.time::timestamp AS time,
-        COALESCE(dicom_series.tag_seriesdescription, '') AS series_description,
-        COALESCE(dicom_series.tag_modality, '') AS modality,
+        COALESCE(tag_seriesdescription, '') AS series_description,
+        COALESCE(tag_modality, '') AS modality,
         -- Child count: patient tasks can have study/series children, study tasks can have series children
         -- Series tasks (uid_type is NULL or 'series') NEVER have children - they are the atomic unit
         CASE
-            WHEN parent_tasks.data->'info'->>'uid_type' = 'patient' THEN (
-                SELECT COUNT(*) FROM tasks t
-                LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
-                WHERE t.id != parent_tasks.id
-                  AND (t.data->'info'->>'uid_type' IN ('study', 'series') OR t.data->'info'->>'uid_type' IS NULL)
-                  AND t.data->'info'->>'uid_type' IS DISTINCT FROM 'patient'
-                  AND COALESCE(t.data->'info'->>'mrn', ds.tag_patientid) = parent_tasks.data->'info'->>'mrn'
-                  AND t.time BETWEEN parent_tasks.time - interval '5 minutes' AND parent_tasks.time
-            )
-            WHEN parent_tasks.data->'info'->>'uid_type' = 'study' THEN (
-                SELECT COUNT(*) FROM tasks t
-                WHERE t.id != parent_tasks.id
-                  AND (t.data->'info'->>'uid_type' IS NULL OR t.data->'info'->>'uid_type' = 'series')
-                  AND t.time BETWEEN parent_tasks.time - interval '3 seconds' AND parent_tasks.time + interval '3 seconds'
-            )
+            WHEN parent_tasks.uid_type = 'patient' THEN patient_children.child_count
+            WHEN parent_tasks.uid_type = 'study' THEN study_children.child_count
             ELSE 0  -- Series tasks have no children
         END AS child_count,
-        COALESCE(
+        -- Braces of the rule names are removed for display
+        TRANSLATE(COALESCE(
             NULLIF(parent_tasks.data->'info'->>'applied_rule', ''),
             (SELECT string_agg(key, ', ') FROM jsonb_object_keys(parent_tasks.data->'info'->'triggered_rules') AS key)
-        ) AS rule
+        ), '{{}}', '') AS rule
     FROM
-        tasks as parent_tasks
-        LEFT JOIN dicom_series ON dicom_series.series_uid = parent_tasks.series_uid
+        parent_tasks
+        -- Tasks of the same patient that arrived up to five minutes before a patient task, collected in one pass
+        LEFT JOIN LATERAL (
+            SELECT
+                STRING_AGG(DISTINCT t.study_uid, ', ') AS study_uids,
+                STRING_AGG(DISTINCT t.series_uid, ', ') AS series_uids,
+                COUNT(*) FILTER (
+                    WHERE t.uid_type IN ('study', 'series') OR t.uid_type IS NULL
+                ) AS child_count
+            FROM tasks t
+            LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
+            WHERE parent_tasks.uid_type = 'patient'
+              AND t.id != parent_tasks.id
+              AND COALESCE(t.mrn, ds.tag_patientid) = parent_tasks.mrn
+              AND t.time BETWEEN parent_tasks.time - interval '5 minutes' AND parent_tasks.time
+        ) patient_children ON true
+        -- Tasks that arrived within three seconds of a study task
+        LEFT JOIN LATERAL (
+            SELECT
+                STRING_AGG(DISTINCT t.series_uid, ', ') AS series_uids,
+                COUNT(*) FILTER (
+                    WHERE t.uid_type = 'series' OR t.uid_type IS NULL
+                ) AS child_count
+            FROM tasks t
+            WHERE parent_tasks.uid_type = 'study'
+              AND t.id != parent_tasks.id
+              AND t.time BETWEEN parent_tasks.time - interval '3 seconds' AND parent_tasks.time + interval '3 seconds'
+        ) study_children ON true
+    ORDER BY
+        {order_sql}
     """
+    return typed_text(count_query_string, find_task_param_types), typed_text(query_string, find_task_param_types)
+
+
+@router.get("/find_task")
+@requires("authenticated")
+async def find_task(request) -> Response:
+    # Extract DataTables parameters
+    draw = int(request.query_params.get("draw", "1"))
+    start = int(request.query_params.get("start", "0"))
+    length = int(request.query_params.get("length", "10"))
+    search_term = request.query_params.get("search[value]", "")  # Global search value
+    group_by = request.query_params.get("group_by", "")  # Filter by scope: patient, study, series, or empty for grouped
+
+    # Extract ordering information
+    order_column_index = request.query_params.get("order[0][column]", "6")  # Default to time column (index 6)
+    order_direction = request.query_params.get("order[0][dir]", "desc")  # Default to descending
+
+    if order_column_index not in find_task_order_columns:
+        order_column_index = "6"
+
+    # Pages ordered by time can continue after the last task of the previous page (keyset pagination), which
+    # avoids reading and skipping all tasks of the preceding pages. Without a valid cursor, the offset is used.
+    cursor = None
+    if order_column_index == "6" and request.query_params.get("cursor"):
+        cursor = decode_task_cursor(request.query_params["cursor"])
+
+    count_query, query = build_find_task_queries(
+        group_by, order_column_index, order_direction.lower(), bool(search_term), cursor is not None
+    )
 
-    if group_by:
-        # Show all tasks of the specified scope
-        query_string = f"""{base_select}
-        WHERE parent_tasks.parent_id is null
-          {scope_filter_term}
-        GROUP BY
-            parent_tasks.id, parent_tasks.study_uid, parent_tasks.series_uid, parent_tasks.time, parent_tasks.data,
-            tag_accessionnumber, tag_patientid, tag_patientname, dicom_series.tag_seriesdescription, dicom_series.tag_modality
-        {having_term}
-        ORDER BY
-            {order_sql}
-        LIMIT :length OFFSET :start
-        """
-    else:
-        # Hierarchical view: show patient tasks OR study tasks (if no patient exists)
-        query_string = f"""{base_select}
-        WHERE parent_tasks.parent_id is null
-          AND (
-              -- Show patient tasks
-              parent_tasks.data->'info'->>'uid_type' = 'patient'
-              OR (
-                  -- Show study tasks only if no patient task exists with same MRN
-                  parent_tasks.data->'info'->>'uid_type' = 'study'
-                  AND NOT EXISTS (
-                      SELECT 1 FROM tasks pt
-                      WHERE pt.data->'info'->>'uid_type' = 'patient'
-                        AND pt.data->'info'->>'mrn' = COALESCE(parent_tasks.data->'info'->>'mrn', tag_patientid)
-                  )
-              )
-          )
-        GROUP BY
-            parent_tasks.id, parent_tasks.study_uid, parent_tasks.series_uid, parent_tasks.time, parent_tasks.data,
-            tag_accessionnumber, tag_patientid, tag_patientname, dicom_series.tag_seriesdescription, dicom_series.tag_modality
-        {having_term}
-        ORDER BY
-            {order_sql}
-        LIMIT :length OFFSET :start
-        """
     # Get total count before filtering
     params = {"search_term": search_term} if search_term else {}
 
-    count_result = await db.database.fetch_one(count_query_string, params)
+    count_result = await db.database.fetch_one(count_query.bindparams(**params))
     total_count = count_result["total_count"] if count_result else 0
     filtered_count = total_count  # In this case, total and filtered are the same since we're not implementing separate filtering
 
     # Execute main query with pagination parameters
-    params.update({"start": start if start is not None else 0, "length": length if length > 0 else None})
-    result_rows = await db.database.fetch_all(query_string, params)
-    results = [dict(row) for row in result_rows]
-
-    # Format data for DataTables
-    data = []
-    for item in results:
-        task_id = item["task_id"]
-        time = item["time"]
-        acc = item["acc"] or ""
-        mrn = item["mrn"] or ""
-
-        scope_value = (item.get("scope") or "").lower()
-        if scope_value == "study":
-            job_scope = "STUDY"
-        elif scope_value == "patient":
-            job_scope = "PATIENT"
-        else:
-            job_scope = "SERIES"
-
-        data.append({
-            "DT_RowId": f"task_{task_id}",  # Add DataTables row identifier
-            "ACC": acc,
-            "MRN": mrn,
-            "Scope": job_scope,
-            "Time": time.isoformat(timespec='seconds') if isinstance(time, datetime.datetime) else str(time),
-            "Rule": (item.get("rule") or "").replace("{", "").replace("}", ""),
-            "task_id": task_id,  # Include task_id for actions/links
-            "study_uid": item.get("study_uid", ""),  # Include study_uid for child task lookup
-            "series_uid": item.get("series_uid", ""),  # Include series_uid for series-level tasks
-            "series_description": item.get("series_description", ""),  # Series description from DICOM
-            "modality": item.get("modality", ""),  # Modality from DICOM
-            "child_count": item.get("child_count", 0)  # Include child count for expandable rows
-        })
+    length = length if 0 < length <= find_task_max_length else find_task_max_length
+    params.update({"start": max(start, 0), "length": length})
+    if cursor is not None:
+        params.update({"start": 0, "cursor_time": cursor[0], "cursor_id": cursor[1]})
 
-    # Return response in DataTables expected format
-    response = {
+    # Return response in DataTables expected format, the rows are sent as "data" entry
+    envelope: Dict[str, Any] = {
         "draw": draw,  # Echo back the draw parameter
         "recordsTotal": total_count,  # Total records before filtering
         "recordsFiltered": filtered_count,  # Total records after filtering
-        "data": data  # The data to be displayed
     }
 
-    return CustomJSONResponse(response)
+    # Format data for DataTables. The rows are formatted and sent while they are read from the database
+    async def format_rows() -> AsyncIterator[Dict]:
+        count = 0
+        async for row in db.database.iterate(query.bindparams(**params)):
+            item = dict(row)
+            count += 1
+            # A full page may be followed by another one, which can start after the last task of this page
+            if order_column_index == "6" and count == length and isinstance(item["time"], datetime.datetime):
+                envelope["next_cursor"] = encode_task_cursor(item["time"], item["task_id"])
+            task_id = item["task_id"]
+            time = item["time"]
+            acc = item["acc"] or ""
+            mrn = item["mrn"] or ""
+
+            scope_value = (item.get("scope") or "").lower()
+            if scope_value == "study":
+                job_scope = "STUDY"
+            elif scope_value == "patient":
+                job_scope = "PATIENT"
+            else:
+                job_scope = "SERIES"
+
+            yield {
+                "DT_RowId": f"task_{task_id}",  # Add DataTables row identifier
+                "ACC": acc,
+                "MRN": mrn,
+                "Scope": job_scope,
+                "Time": time.isoformat(timespec='seconds') if isinstance(time, datetime.datetime) else str(time),
+                "Rule": item["rule"] or "",
+                "task_id": task_id,  # Include task_id for actions/links
+                "study_uid": item.get("study_uid", ""),  # Include study_uid for child task lookup
+                "series_uid": item.get("series_uid", ""),  # Include series_uid for series-level tasks
+                "series_description": item.get("series_description", ""),  # Series description from DICOM
+                "modality": item.get("modality", ""),  # Modality from DICOM
+                "child_count": item.get("child_count", 0)  # Include child count for expandable rows
+            }
+
+    return await CustomStreamingJSONResponse.start(format_rows(), envelope)
+
+
+def encode_task_cursor(time: datetime.datetime, task_id: str) -> str:
+    """Returns an opaque cursor pointing at the given task of the find_task list."""
+    return base64.urlsafe_b64encode(json.dumps([time.isoformat(), task_id]).encode()).decode()
+
+
+def decode_task_cursor(cursor: str) -> Optional[Tuple[datetime.datetime, str]]:
+    """Returns the time and the id of the task a cursor points at, or None if the cursor is invalid."""
+    try:
+        time, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.datetime.fromisoformat(time), str(task_id)
+    except (TypeError, ValueError):
+        return None
 
 
 def convert_key(tag_key):
@@ -652,7 +604,7 @@ def convert_key(tag_key):
         return tag_key
 
 
-def dicom_to_readable_json(ds: pydicom.Dataset):
+def dicom_to_readable_json(ds: pydicom.Dataset) -> Dict:
     """
     Converts a DICOM file to a human-readable JSON format.
 
@@ -661,41 +613,191 @@ def dicom_to_readable_json(ds: pydicom.Dataset):
         output_file_path (str): Path to save the JSON output.
     """
     try:
-        result = json.dumps(ds, default=convert_to_serializable)
-        return json.loads(result)
+        return dataset_to_dict(ds)
     except Exception as e:
         logger.exception(f"Error converting DICOM to readable JSON: {e}")
         return {}
 
 
-def convert_to_serializable(obj):
+@functools.lru_cache(maxsize=4096)
+def tag_keyword(tag: int) -> str:
+    """Returns the keyword of a DICOM tag, or "gggg,eeee" for private and unknown tags."""
+    return keyword_for_tag(tag) or f"{tag >> 16:04X},{tag & 0xFFFF:04X}"
+
+
+# Binary values up to this size are shown base64 encoded, larger ones only with their length
+max_displayed_bytes = 500
+
+# Converters from the values of data elements to JSON-serializable values, by value representation
+vr_converters: Dict[str, Callable[[Any], Any]] = {
+    "DS": float,
+    "IS": int,
+    "FL": float,
+    "FD": float,
+    "SS": int,
+    "US": int,
+    "SL": int,
+    "UL": int,
+    "SV": int,
+    "UV": int,
+    "AT": lambda value: str(pydicom.tag.Tag(value)),
+    "UI": lambda value: pydicom.uid.UID(value).name,
+    **{vr: str for vr in ("AE", "AS", "CS", "DA", "DT", "LO", "LT", "PN", "SH", "ST", "TM", "UC", "UR", "UT")},
+}
+
+
+def convert_value(vr: str, value: Any) -> Any:
     """
-    Converts non-serializable objects to serializable types.
+    Converts the value of a data element into a JSON-serializable value. Raises TypeError or ValueError if the
+    value cannot be converted.
     """
-    if isinstance(obj, pydicom.dataset.Dataset):
-        return {keyword_for_tag(el.tag) or el.tag.json_key[:4]+","+el.tag.json_key[4:]: obj[el.tag] for el in obj.elements()}
-    if isinstance(obj, pydicom.dataelem.DataElement):
+    if vr == "SQ":
+        return [dataset_to_dict(item) for item in value]
+    if value is None:
+        return None
+    if value == "":
+        return ""
+    if isinstance(value, (MultiValue, list)):
+        return [convert_value(vr, item) for item in value]
+    converter = vr_converters.get(vr)
+    if converter is not None:
+        return converter(value)
+    # Ambiguous or unknown VRs, e.g. private tags of implicit VR datasets, are converted by the type of the value
+    if isinstance(value, (int, float, str)):
+        return value
+    if isinstance(value, PersonName):
+        return str(value)
+    if isinstance(value, bytes):
         try:
-            obj.maxBytesToDisplay = 500
-            obj.descripWidth = 500
-            # see if the representation of this element can be converted to JSON
-            # this will convert eg lists to python lists, numbers to python numbers, etc
-            json.dumps(evaled := ast.literal_eval(obj.repval))
-            return evaled
-        except:
-            return obj.repval
-    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+            text = value.rstrip(b"\x00 ").decode("ascii")
+            if text.isprintable():
+                return text
+        except UnicodeDecodeError:
+            pass
+        if len(value) <= max_displayed_bytes:
+            return base64.b64encode(value).decode("ascii")
+    raise TypeError(f"Value of type {type(value)} cannot be converted")
 
 
-@router.get("/get_task_info")
-@requires("authenticated")
-async def get_task_info(request) -> JSONResponse:
-    response: Dict = {}
+def element_to_value(elem: pydicom.DataElement) -> Any:
+    """
+    Returns the JSON-serializable value of a data element. Binary data and values that do not match their VR are
+    shown with the representation provided by pydicom.
+    """
+    try:
+        return convert_value(elem.VR, elem.value)
+    except (TypeError, ValueError):
+        if isinstance(elem.value, str):
+            return elem.value
+        elem.maxBytesToDisplay = max_displayed_bytes
+        elem.descripWidth = 500
+        return elem.repval
 
-    task_id = request.query_params.get("task_id", "")
-    if not task_id:
-        return CustomJSONResponse(response)
-    # First, get general information about the series/study
+
+def dataset_to_dict(ds: pydicom.Dataset) -> Dict[str, Any]:
+    """
+    Converts a dataset into a dictionary keyed by the keywords of the tags. The elements are taken from the element
+    dictionary of the dataset, so that only the elements that are still raw go through the element lookup.
+    """
+    elements = ds._dict
+    result = {}
+    for tag in sorted(elements):
+        elem = elements[tag]
+        if not isinstance(elem, pydicom.DataElement):
+            elem = ds[tag]
+        result[tag_keyword(tag)] = element_to_value(elem)
+    return result
+
+
+# Worker processes for reading and converting DICOM headers, created on first use
+dicom_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+
+def convert_json_tags(tags: Dict) -> Dict:
+    """Converts DICOM tags in the DICOM JSON model into readable JSON."""
+    return dicom_to_readable_json(pydicom.Dataset.from_json(tags))
+
+
+def read_sample_tags(folder: str) -> Optional[Dict]:
+    """Returns the readable tags of the first DICOM file found in the folder, or None if there is no DICOM file."""
+    sample_file = next(Path(folder).rglob("*.dcm"), None)
+    if sample_file is None:
+        return None
+    return dicom_to_readable_json(pydicom.dcmread(sample_file, stop_before_pixels=True))
+
+
+async def run_dicom_conversion(function: Callable[[Any], T], argument: Any, inline: bool = False) -> T:
+    """
+    Runs a DICOM conversion in the worker processes, so that large headers neither block the event loop nor hold
+    the GIL of the bookkeeper. Small conversions are run inline, as the transfer to a worker would take longer.
+    """
+    global dicom_pool
+    if inline:
+        return function(argument)
+    if dicom_pool is None:
+        # The workers are started from a fork server, as forking the bookkeeper itself while its worker threads
+        # are running could leave locks held in the children, such as the locks of the logging handlers
+        dicom_pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1), mp_context=multiprocessing.get_context("forkserver")
+        )
+    return await asyncio.get_running_loop().run_in_executor(dicom_pool, function, argument)
+
+
+def shutdown_dicom_pool() -> None:
+    """Stops the worker processes for the DICOM conversions, if they have been started."""
+    global dicom_pool
+    if dicom_pool is not None:
+        dicom_pool.shutdown()
+        dicom_pool = None
+
+
+# General information about the series of root tasks, by task id. Tasks that are updated by the bookkeeper are
+# removed from the cache.
+task_info_cache: TTLCache[Dict] = TTLCache(maxsize=4096, ttl=300)
+
+# Readable tags of a sample file, by task folder. The folders in the success and error folders are not modified
+# anymore, so the sample file only needs to be searched and read once.
+sample_tags_cache: TTLCache[Dict] = TTLCache(maxsize=1024, ttl=300)
+
+
+# Names of the series columns in the information returned by get_task_info
+task_info_tag_names: Mapping[str, str] = MappingProxyType({
+    "series_uid": "SeriesUID",
+    "study_uid": "StudyUID",
+    "tag_patientname": "PatientName",
+    "tag_patientid": "PatientID",
+    "tag_accessionnumber": "AccessionNumber",
+    "tag_seriesnumber": "SeriesNumber",
+    "tag_studyid": "StudyID",
+    "tag_patientbirthdate": "PatientBirthDate",
+    "tag_patientsex": "PatientSex",
+    "tag_acquisitiondate": "AcquisitionDate",
+    "tag_acquisitiontime": "AcquisitionTime",
+    "tag_modality": "Modality",
+    "tag_bodypartexamined": "BodyPartExamined",
+    "tag_studydescription": "StudyDescription",
+    "tag_seriesdescription": "SeriesDescription",
+    "tag_protocolname": "ProtocolName",
+    "tag_codevalue": "CodeValue",
+    "tag_codemeaning": "CodeMeaning",
+    "tag_sequencename": "SequenceName",
+    "tag_scanningsequence": "ScanningSequence",
+    "tag_sequencevariant": "SequenceVariant",
+    "tag_slicethickness": "SliceThickness",
+    "tag_contrastbolusagent": "ContrastBolusAgent",
+    "tag_referringphysicianname": "ReferringPhysicianName",
+    "tag_manufacturer": "Manufacturer",
+    "tag_manufacturermodelname": "ManufacturerModelName",
+    "tag_magneticfieldstrength": "MagneticFieldStrength",
+    "tag_deviceserialnumber": "DeviceSerialNumber",
+    "tag_softwareversions": "SoftwareVersions",
+    "tag_stationname": "StationName",
+})
+
+
+async def get_task_series_info(task_id: str) -> Dict:
+    """Returns the DICOM information of the series of a root task, and the tags received with the task."""
+    response: Dict = {}
     query = (
         select(db.dicom_series, db.tasks_table.c.data)
         .select_from(db.tasks_table)
@@ -707,90 +809,153 @@ async def get_task_info(request) -> JSONResponse:
         .limit(1)
     )
     result = await db.database.fetch_one(query)
-    # info_rows = await db.database.fetch_all(info_query)
     if result:
         result_dict = dict(result)
-        rename = {
-            "series_uid": "SeriesUID",
-            "study_uid": "StudyUID",
-            "tag_patientname": "PatientName",
-            "tag_patientid": "PatientID",
-            "tag_accessionnumber": "AccessionNumber",
-            "tag_seriesnumber": "SeriesNumber",
-            "tag_studyid": "StudyID",
-            "tag_patientbirthdate": "PatientBirthDate",
-            "tag_patientsex": "PatientSex",
-            "tag_acquisitiondate": "AcquisitionDate",
-            "tag_acquisitiontime": "AcquisitionTime",
-            "tag_modality": "Modality",
-            "tag_bodypartexamined": "BodyPartExamined",
-            "tag_studydescription": "StudyDescription",
-            "tag_seriesdescription": "SeriesDescription",
-            "tag_protocolname": "ProtocolName",
-            "tag_codevalue": "CodeValue",
-            "tag_codemeaning": "CodeMeaning",
-            "tag_sequencename": "SequenceName",
-            "tag_scanningsequence": "ScanningSequence",
-            "tag_sequencevariant": "SequenceVariant",
-            "tag_slicethickness": "SliceThickness",
-            "tag_contrastbolusagent": "ContrastBolusAgent",
-            "tag_referringphysicianname": "ReferringPhysicianName",
-            "tag_manufacturer": "Manufacturer",
-            "tag_manufacturermodelname": "ManufacturerModelName",
-            "tag_magneticfieldstrength": "MagneticFieldStrength",
-            "tag_deviceserialnumber": "DeviceSerialNumber",
-            "tag_softwareversions": "SoftwareVersions",
-            "tag_stationname": "StationName",
-        }
-
         response["information"] = {
-            rename.get(x, x): result_dict.get(x)
-            for x in result_dict.keys() if x not in ('id', 'time', 'data')
+            name: result_dict[column] for column, name in task_info_tag_names.items() if column in result_dict
         }
         try:
-            if 'data' in result_dict and isinstance(result_dict['data'], str):
-                data = json.loads(result_dict.get('data', '{}'))
-                if data is not None:
-                    tags = dict(data).get("tags", None)
-                    if tags is not None:
-                        ds = pydicom.Dataset.from_json(tags)
-                        response["sample_tags_received"] = dicom_to_readable_json(ds)
+            # The JSONB column is already decoded by the database layer
+            data = result_dict.get('data')
+            if isinstance(data, dict):
+                tags = data.get("tags", None)
+                if tags is not None:
+                    response["sample_tags_received"] = await run_dicom_conversion(
+                        convert_json_tags, tags, inline=len(tags) < 100
+                    )
         except:
             logger.exception("Error parsing data")
 
-    # Now, get the task files embedded into the task or its subtasks
+    return response
+
+
+async def get_cached_task_series_info(task_id: str) -> Dict:
+    """
+    Returns the series information of a root task. It does not change once the series has been registered, so it
+    is cached until the task is updated.
+    """
+    info = task_info_cache.get(task_id)
+    if info is None:
+        info = await get_task_series_info(task_id)
+        if info.get("information", {}).get("SeriesUID") is not None:
+            task_info_cache.set(task_id, info)
+    return info
+
+
+def find_task_folders(task_ids: List[str]) -> Dict[str, Path]:
+    """Returns the folders of the given tasks in the success or error folder, by task id, for the tasks that have one."""
+    task_folders = {}
+    for task_id in task_ids:
+        for k in [Path(config.mercure.success_folder), Path(config.mercure.error_folder)]:
+            if (found_folder := k / task_id).exists():
+                task_folders[task_id] = found_folder
+                break
+    return task_folders
+
+
+@router.get("/get_task_info")
+@requires("authenticated")
+async def get_task_info(request) -> JSONResponse:
+    response: Dict = {}
+
+    task_id = request.query_params.get("task_id", "")
+    if not task_id:
+        return CustomJSONResponse(response)
+    # Get the general information about the series/study and the task files embedded into the task or its subtasks.
+    # Both queries are independent, so they run concurrently on separate connections.
     query = (
         db.tasks_table.select()
         .order_by(db.tasks_table.c.id)
         .where(sqlalchemy.or_(db.tasks_table.c.id == task_id, db.tasks_table.c.parent_id == task_id))
     )
-    result_rows = await db.database.fetch_all(query)
-    results = [dict(row) for row in result_rows]
-    for item in results:
-        if item["data"] and set(item["data"].keys()) != {"id", "tags"}:
+    info, items = await asyncio.gather(get_cached_task_series_info(task_id), db.database.fetch_all(query))
+    response.update(info)
+    # The folders of all tasks are looked up in one go, so that the event loop does not wait for the file system
+    task_folders = await run_in_threadpool(find_task_folders, [item["id"] for item in items])
+
+    for item in items:
+        if item["data"] and item["data"].keys() != {"id", "tags"}:
             task_id = "task " + item["id"]
             response[task_id] = item["data"]
 
-        task_folder = None
-        for k in [Path(config.mercure.success_folder), Path(config.mercure.error_folder)]:
-            if (found_folder := k / item["id"]).exists():
-                task_folder = found_folder
-                break
-        else:
+        task_folder = task_folders.get(item["id"])
+        if task_folder is None:
             continue
 
-        try:
-            sample_file = next(task_folder.rglob("*.dcm"))
-            tags = dicom_to_readable_json(pydicom.dcmread(sample_file, stop_before_pixels=True))
+        tags = sample_tags_cache.get(str(task_folder))
+        if tags is None:
+            tags = await run_dicom_conversion(read_sample_tags, str(task_folder))
+            if tags is not None:
+                sample_tags_cache.set(str(task_folder), tags)
+        if tags is not None:
             if task_id not in response:
                 response[task_id] = {}
             response[task_id]["sample_tags_result"] = tags
-        except (StopIteration, json.JSONDecodeError):
-            pass
 
     return CustomJSONResponse(response)
 
 
+# Types of the bound parameters of the task lookup queries
+task_lookup_param_types: Mapping[str, Any] = MappingProxyType({
+    "parent_id": sqlalchemy.String,
+    "task_id": sqlalchemy.String,
+})
+
+# Study and series tasks of the same patient that were created within 5 minutes before a patient task
+child_tasks_of_patient_query = typed_text("""
+    WITH parent AS (
+        SELECT id, time, mrn FROM tasks WHERE id = :parent_id
+    )
+    SELECT
+        child_tasks.id AS task_id,
+        child_tasks.series_uid,
+        child_tasks.study_uid,
+        dicom_series.tag_seriesdescription AS series_description,
+        dicom_series.tag_modality AS modality,
+        TRANSLATE(COALESCE(
+            NULLIF(child_tasks.data->'info'->>'applied_rule', ''),
+            (SELECT string_agg(key, ', ') FROM jsonb_object_keys(child_tasks.data->'info'->'triggered_rules') AS key)
+        ), '{}', '') AS rule,
+        COALESCE(child_tasks.uid_type, 'series') AS scope
+    FROM
+        tasks as child_tasks
+        LEFT JOIN dicom_series ON dicom_series.series_uid = child_tasks.series_uid
+        CROSS JOIN parent
+    WHERE child_tasks.id != parent.id
+      AND child_tasks.uid_type IS DISTINCT FROM 'patient'
+      AND COALESCE(child_tasks.mrn, dicom_series.tag_patientid) = parent.mrn
+      AND child_tasks.time BETWEEN parent.time - interval '5 minutes' AND parent.time
+    ORDER BY
+        CASE WHEN child_tasks.uid_type = 'study' THEN 0 ELSE 1 END,
+        child_tasks.time, child_tasks.id
+    """, task_lookup_param_types)
+
+# Tasks that were created within 3 seconds of a study task
+child_tasks_of_study_query = typed_text("""
+    WITH parent AS (
+        SELECT id, time FROM tasks WHERE id = :parent_id
+    )
+    SELECT
+        child_tasks.id AS task_id,
+        child_tasks.series_uid,
+        child_tasks.study_uid,
+        dicom_series.tag_seriesdescription AS series_description,
+        dicom_series.tag_modality AS modality,
+        TRANSLATE(COALESCE(
+            NULLIF(child_tasks.data->'info'->>'applied_rule', ''),
+            (SELECT string_agg(key, ', ') FROM jsonb_object_keys(child_tasks.data->'info'->'triggered_rules') AS key)
+        ), '{}', '') AS rule,
+        child_tasks.uid_type AS scope
+    FROM
+        tasks as child_tasks
+        LEFT JOIN dicom_series ON dicom_series.series_uid = child_tasks.series_uid
+        CROSS JOIN parent
+    WHERE child_tasks.id != parent.id
+      AND child_tasks.time BETWEEN parent.time - interval '3 seconds' AND parent.time + interval '3 seconds'
+    ORDER BY child_tasks.time, child_tasks.id
+    """, task_lookup_param_types)
+
+
 @router.get("/get_child_tasks")
 @requires("authenticated")
 async def get_child_tasks(request) -> JSONResponse:
@@ -804,67 +969,16 @@ async def get_child_tasks(request) -> JSONResponse:
     if scope == "patient":
         # For patient tasks: get study and series tasks with matching MRN
         # that were created within 5 minutes before the patient task (same processing run)
-        query_string = """
-        WITH parent AS (
-            SELECT id, time, data->'info'->>'mrn' AS mrn FROM tasks WHERE id = :parent_id
-        )
-        SELECT
-            child_tasks.id AS task_id,
-            child_tasks.series_uid,
-            child_tasks.study_uid,
-            dicom_series.tag_seriesdescription AS series_description,
-            dicom_series.tag_modality AS modality,
-            COALESCE(
-                NULLIF(child_tasks.data->'info'->>'applied_rule', ''),
-                (SELECT string_agg(key, ', ') FROM jsonb_object_keys(child_tasks.data->'info'->'triggered_rules') AS key)
-            ) AS rule,
-            COALESCE(child_tasks.data->'info'->>'uid_type', 'series') AS scope
-        FROM
-            tasks as child_tasks
-            LEFT JOIN dicom_series ON dicom_series.series_uid = child_tasks.series_uid
-            CROSS JOIN parent
-        WHERE child_tasks.id != parent.id
-          AND (child_tasks.data->'info'->>'uid_type' IN ('study', 'series') OR child_tasks.data->'info'->>'uid_type' IS NULL)
-          AND child_tasks.data->'info'->>'uid_type' IS DISTINCT FROM 'patient'
-          AND COALESCE(child_tasks.data->'info'->>'mrn', dicom_series.tag_patientid) = parent.mrn
-          AND child_tasks.time BETWEEN parent.time - interval '5 minutes' AND parent.time
-        ORDER BY
-            CASE WHEN child_tasks.data->'info'->>'uid_type' = 'study' THEN 0 ELSE 1 END,
-            child_tasks.time, child_tasks.id
-        """
+        query = child_tasks_of_patient_query
     else:
         # For study tasks: get series tasks created within 3 seconds
-        query_string = """
-        WITH parent AS (
-            SELECT id, time FROM tasks WHERE id = :parent_id
-        )
-        SELECT
-            child_tasks.id AS task_id,
-            child_tasks.series_uid,
-            child_tasks.study_uid,
-            dicom_series.tag_seriesdescription AS series_description,
-            dicom_series.tag_modality AS modality,
-            COALESCE(
-                NULLIF(child_tasks.data->'info'->>'applied_rule', ''),
-                (SELECT string_agg(key, ', ') FROM jsonb_object_keys(child_tasks.data->'info'->'triggered_rules') AS key)
-            ) AS rule,
-            child_tasks.data->'info'->>'uid_type' AS scope
-        FROM
-            tasks as child_tasks
-            LEFT JOIN dicom_series ON dicom_series.series_uid = child_tasks.series_uid
-            CROSS JOIN parent
-        WHERE child_tasks.id != parent.id
-          AND child_tasks.time BETWEEN parent.time - interval '3 seconds' AND parent.time + interval '3 seconds'
-        ORDER BY child_tasks.time, child_tasks.id
-        """
+        query = child_tasks_of_study_query
 
-    result_rows = await db.database.fetch_all(query_string, {"parent_id": parent_id})
+    result_rows = await db.database.fetch_all(query.bindparams(parent_id=parent_id))
     results = []
     for row in result_rows:
         row_dict = dict(row)
         rule = row_dict.get("rule", "")
-        if rule:
-            rule = rule.replace("{", "").replace("}", "")
         scope_val = (row_dict.get("scope") or "").lower()
         if scope_val == "study":
             scope_display = "STUDY"
@@ -885,111 +999,118 @@ async def get_child_tasks(request) -> JSONResponse:
     return CustomJSONResponse(results)
 
 
-@router.get("/find_output_folder")
-@requires("authenticated")
-async def find_output_folder(request) -> JSONResponse:
-    """Find the output folder task ID for a given task.
+# Patient and study tasks with the MRN of a task that were started between 10 minutes before and 5 minutes after
+# the task, which may hold the output folder of the task. The MRN of the task is taken from the task data or the DICOM
+# series, and patient tasks have no such parent.
+output_folder_parent_query = typed_text("""
+    WITH target AS (
+        SELECT
+            t.id,
+            t.uid_type,
+            COALESCE(t.mrn, ds.tag_patientid) as mrn,
+            t.time
+        FROM tasks t
+        LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
+        WHERE t.id = :task_id
+    )
+    SELECT
+        t.id as task_id
+    FROM target, tasks t
+    LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
+    WHERE target.uid_type IS DISTINCT FROM 'patient'
+      AND target.mrn != ''
+      AND t.parent_id IS NULL
+      AND t.id != target.id
+      AND t.uid_type IN ('patient', 'study')
+      AND COALESCE(t.mrn, ds.tag_patientid) = target.mrn
+      AND t.time BETWEEN target.time - interval '10 minutes' AND target.time + interval '5 minutes'
+    ORDER BY
+        CASE WHEN t.uid_type = 'patient' THEN 0 ELSE 1 END,
+        t.time DESC
+    LIMIT 10
+    """, task_lookup_param_types)
 
-    For series/study tasks, output files may be stored under a parent task's folder.
-    This endpoint finds the correct folder by:
-    1. Checking if the task has its own folder
-    2. If not, finding a parent task (patient/study) with same MRN that has a folder
 
-    Returns: {task_id: str, location: str|null, exists: bool}
-    """
-    task_id = request.query_params.get("task_id", "")
+# Names in the success and error folders, by folder. Listing a folder once replaces the checks of the individual
+# task folders, of which find_output_folder may need up to 22 per request.
+task_folders_cache: TTLCache[FrozenSet[str]] = TTLCache(maxsize=8, ttl=5)
 
-    if not task_id:
-        return CustomJSONResponse({"task_id": task_id, "location": None, "exists": False})
+
+async def list_task_folders(folder: str) -> FrozenSet[str]:
+    """Returns the names of the task folders in the given folder, which are listed at most every 5 seconds."""
+    names = task_folders_cache.get(folder)
+    if names is None:
+        try:
+            names = frozenset(await run_in_threadpool(os.listdir, folder))
+        except OSError:
+            logger.exception(f"Unable to list the task folders in {folder}")
+            names = frozenset()
+        task_folders_cache.set(folder, names)
+    return names
+
+
+# Output folders that have been found, by task id. Folders are not moved once they exist, so the lookup only needs to
+# be repeated after a while in case the folder has been removed.
+output_folder_cache: TTLCache[Dict] = TTLCache(maxsize=4096, ttl=30)
+
+
+async def locate_output_folder(task_id: str) -> Dict:
+    """Returns the task id and the location of the folder that holds the output of the given task."""
+    success_names, error_names = await asyncio.gather(
+        list_task_folders(config.mercure.success_folder), list_task_folders(config.mercure.error_folder)
+    )
+    task_folders: List[Tuple[str, FrozenSet[str]]] = [("success", success_names), ("error", error_names)]
 
     # Check if this task has its own folder
-    for location, folder in [("success", config.mercure.success_folder),
-                              ("error", config.mercure.error_folder)]:
-        task_folder = Path(folder) / task_id
-        if task_folder.exists():
-            return CustomJSONResponse({
+    for location, folder_names in task_folders:
+        if task_id in folder_names:
+            return {
                 "task_id": task_id,
                 "location": location,
                 "exists": True
-            })
+            }
 
-    # Task doesn't have its own folder - find MRN and look for parent folder
-    # Query to get task's MRN (from task data or dicom_series)
-    mrn_query = """
-    SELECT
-        t.id,
-        t.data->'info'->>'uid_type' as uid_type,
-        COALESCE(t.data->'info'->>'mrn', ds.tag_patientid) as mrn,
-        t.time
-    FROM tasks t
-    LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
-    WHERE t.id = :task_id
-    """
+    # Task doesn't have its own folder - look for a parent task with the same MRN that has a folder. The MRN of the
+    # task and the parent tasks are looked up in one statement.
+    parent_results = await db.database.fetch_all(output_folder_parent_query.bindparams(task_id=task_id))
 
-    task_result = await db.database.fetch_one(mrn_query, {"task_id": task_id})
+    # Check each potential parent to see if it has a folder
+    for parent in parent_results:
+        parent_id = parent["task_id"]
+        for location, folder_names in task_folders:
+            if parent_id in folder_names:
+                return {
+                    "task_id": parent_id,
+                    "location": location,
+                    "exists": True
+                }
 
-    if not task_result:
-        return CustomJSONResponse({"task_id": task_id, "location": None, "exists": False})
+    return {"task_id": task_id, "location": None, "exists": False}
 
-    task_dict = dict(task_result)
-    mrn = task_dict.get("mrn")
-    uid_type = task_dict.get("uid_type")
-    task_time = task_dict.get("time")
 
-    # If this is already a patient task, no parent to find
-    if uid_type == "patient":
-        return CustomJSONResponse({"task_id": task_id, "location": None, "exists": False})
+@router.get("/find_output_folder")
+@requires("authenticated")
+async def find_output_folder(request) -> JSONResponse:
+    """Find the output folder task ID for a given task.
 
-    if not mrn:
-        return CustomJSONResponse({"task_id": task_id, "location": None, "exists": False})
+    For series/study tasks, output files may be stored under a parent task's folder.
+    This endpoint finds the correct folder by:
+    1. Checking if the task has its own folder
+    2. If not, finding a parent task (patient/study) with same MRN that has a folder
 
-    # Find parent task (patient or study) with same MRN within time window
-    parent_query = """
-    SELECT
-        t.id as task_id,
-        t.data->'info'->>'uid_type' as uid_type
-    FROM tasks t
-    LEFT JOIN dicom_series ds ON ds.series_uid = t.series_uid
-    WHERE t.parent_id IS NULL
-      AND t.id != :task_id
-      AND COALESCE(t.data->'info'->>'mrn', ds.tag_patientid) = :mrn
-      AND t.data->'info'->>'uid_type' IN ('patient', 'study')
-      AND t.time BETWEEN :time_start AND :time_end
-    ORDER BY
-        CASE WHEN t.data->'info'->>'uid_type' = 'patient' THEN 0 ELSE 1 END,
-        t.time DESC
-    LIMIT 10
+    Returns: {task_id: str, location: str|null, exists: bool}
     """
+    task_id = request.query_params.get("task_id", "")
 
-    # Calculate time window (task_time should already be a datetime from the query)
-    if isinstance(task_time, str):
-        task_time = datetime.datetime.fromisoformat(task_time.replace('Z', '+00:00'))
-    if task_time is None:
+    if not task_id:
         return CustomJSONResponse({"task_id": task_id, "location": None, "exists": False})
-    time_start = task_time - datetime.timedelta(minutes=10)
-    time_end = task_time + datetime.timedelta(minutes=5)
-
-    parent_results = await db.database.fetch_all(parent_query, {
-        "task_id": task_id,
-        "mrn": mrn,
-        "time_start": time_start,
-        "time_end": time_end
-    })
-
-    # Check each potential parent to see if it has a folder
-    for parent in parent_results:
-        parent_id = parent["task_id"]
-        for location, folder in [("success", config.mercure.success_folder),
-                                  ("error", config.mercure.error_folder)]:
-            parent_folder = Path(folder) / parent_id
-            if parent_folder.exists():
-                return CustomJSONResponse({
-                    "task_id": parent_id,
-                    "location": location,
-                    "exists": True
-                })
 
-    return CustomJSONResponse({"task_id": task_id, "location": None, "exists": False})
+    result = output_folder_cache.get(task_id)
+    if result is None:
+        result = await locate_output_folder(task_id)
+        if result["exists"]:
+            output_folder_cache.set(task_id, result)
+    return CustomJSONResponse(result)
 
 
 query_app = Starlette(routes=router)
@@ -15,6 +15,7 @@ from typing import Any, Dict, Optional
 
 import aiohttp
 import daiquiri
+import orjson
 from common.event_types import m_events, severity, task_event, w_events
 # App-specific includes
 from common.types import Task, TaskProcessing
@@ -128,8 +129,9 @@ async def get(endpoint: str, payload: Any = {}) -> Any:
                 except KeyError:
                     raise MonitorHTTPError(resp.status, "Unknown error")
 
-            result = await resp.json()
-            logger.debug(f"Monitor GET {endpoint} response: {result}")
+            # The query results can be large, so they are parsed with orjson and only formatted if debug logging is on
+            result = await resp.json(loads=orjson.loads)
+            logger.debug("Monitor GET %s response: %s", endpoint, result)
             return result
 
 
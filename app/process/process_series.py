@@ -5,14 +5,22 @@ Helper functions for mercure's processor module
 """
 
 # Standard python includes
+import asyncio
+import codecs
+import concurrent.futures
+import functools
+import itertools
 import json
+import logging
 import os
 import shutil
+import subprocess
 import sys
+import time
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional, cast
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
 
 import common.config as config
 import common.helper as helper
@@ -20,6 +28,7 @@ import common.log_helpers as log_helpers
 # App-specific includes
 import common.monitor as monitor
 import common.notification as notification
+import orjson
 from common.constants import mercure_events, mercure_names
 from common.event_types import FailStage
 from common.types import Module, Task, TaskProcessing
@@ -34,8 +43,38 @@ import nomad
 logger = config.get_logger()
 
 
+@functools.lru_cache(maxsize=None)
+def get_docker_client() -> docker.DockerClient:
+    """
+    Returns the Docker client of the processor, which is created on first use and then shared by all tasks. The
+    timeout is extended for resilient registry operations, as the default of 60 seconds may not be enough for
+    large images.
+    """
+    return docker.from_env(timeout=120)  # type: ignore
+
+
+@functools.lru_cache(maxsize=None)
+def docker_userns_remap_enabled() -> bool:
+    """Checks if the Docker daemon maps the users of the containers to subordinate ids (userns-remap)."""
+    security_options = get_docker_client().info().get("SecurityOptions") or []
+    return any("name=userns" in option for option in security_options)
+
+
+@functools.lru_cache(maxsize=None)
+def get_nomad_connection() -> nomad.Nomad:
+    """Returns the connection to Nomad, which is created on first use and then shared by all dispatches."""
+    return nomad.Nomad(host="172.17.0.1", timeout=5)  # type: ignore
+
+
+@functools.lru_cache(maxsize=None)
+def get_nomad_template() -> Template:
+    """Loads the job template for the processor on first use, so that it is only compiled once."""
+    with open("nomad/mercure-processor-template.nomad", "r") as f:
+        return Template(f.read())
+
+
 async def nomad_runtime(task: Task, folder: Path, file_count_begin: int, task_processing: TaskProcessing) -> bool:
-    nomad_connection = nomad.Nomad(host="172.17.0.1", timeout=5)  # type: ignore
+    nomad_connection = get_nomad_connection()
 
     if not task.process:
         return False
@@ -46,14 +85,13 @@ async def nomad_runtime(task: Task, folder: Path, file_count_begin: int, task_pr
         logger.error("No docker tag supplied")
         return False
 
-    with open("nomad/mercure-processor-template.nomad", "r") as f:
-        rendered = Template(f.read()).render(
-            image=module.docker_tag,
-            mercure_tag=mercure_version.get_image_tag(),
-            constraints=module.constraints,
-            resources=module.resources,
-            uid=os.getuid(),
-        )
+    rendered = get_nomad_template().render(
+        image=module.docker_tag,
+        mercure_tag=mercure_version.get_image_tag(),
+        constraints=module.constraints,
+        resources=module.resources,
+        uid=os.getuid(),
+    )
     logger.debug("----- job definition -----")
     logger.debug(rendered)
     try:
@@ -72,8 +110,7 @@ async def nomad_runtime(task: Task, folder: Path, file_count_begin: int, task_pr
     meta = {"PATH": folder.name}
     logger.debug(meta)
     job_info = nomad_connection.job.dispatch_job(f"processor-{task_processing.module_name}", meta=meta)
-    with open(folder / "nomad_job.json", "w") as json_file:
-        json.dump(job_info, json_file, indent=4)
+    write_json_file(folder / "nomad_job.json", job_info)
 
     monitor.send_task_event(
         monitor.task_event.PROCESS_BEGIN,
@@ -86,6 +123,51 @@ async def nomad_runtime(task: Task, folder: Path, file_count_begin: int, task_pr
 
 
 docker_pull_throttle: Dict[str, datetime] = {}
+docker_prune_time: Optional[datetime] = None
+
+# Images whose signature has been verified, keyed by (digest, certificate identity, OIDC issuer). The digest pins the
+# image content, so a verification stays valid until it expires or the tag points to a new image.
+docker_signature_cache: Dict[Tuple[str, str, str], datetime] = {}
+signature_cache_ttl = 86400
+
+
+def normalize_repository(repository_name: str) -> Tuple[str, str]:
+    """Returns the registry and the repository of a repository name, with the implicit parts of Docker Hub names."""
+    registry, repository = docker.auth.resolve_repository_name(repository_name)
+    if registry == docker.auth.INDEX_NAME and "/" not in repository:
+        repository = "library/" + repository
+    return registry, repository
+
+
+def get_image_digest(docker_client: docker.DockerClient, docker_tag: str) -> Optional[str]:
+    """
+    Returns the digest reference (repository@sha256:...) of the local image with the given tag, if it has one. An
+    image that is tagged in several repositories has a digest reference for each of them, only the one of the
+    repository of the tag is returned.
+    """
+    try:
+        repo_digests = docker_client.images.get(docker_tag).attrs.get("RepoDigests") or []
+        repository = normalize_repository(docker.utils.parse_repository_tag(docker_tag)[0])
+    except Exception:
+        return None
+    for repo_digest in repo_digests:
+        digest_repository, _, digest = repo_digest.partition('@')
+        if digest and normalize_repository(digest_repository) == repository:
+            return str(repo_digest)
+    return None
+
+
+def get_up_to_date_digest(docker_client: docker.DockerClient, docker_tag: str) -> Optional[str]:
+    """
+    Returns the digest reference of the local image of the tag if it is the one that the registry currently serves for
+    the tag, None otherwise. Only the manifest digest is requested from the registry, which is much cheaper than a pull.
+    """
+    try:
+        repo_digests = docker_client.images.get(docker_tag).attrs.get("RepoDigests") or []
+        remote_digest = docker_client.api.inspect_distribution(docker_tag)["Descriptor"]["digest"]
+    except Exception:
+        return None
+    return next((str(repo_digest) for repo_digest in repo_digests if repo_digest.split('@')[-1] == remote_digest), None)
 
 
 def verify_container_signature(docker_tag: str, module: Module) -> bool:
@@ -129,41 +211,65 @@ def verify_container_signature(docker_tag: str, module: Module) -> bool:
 
     logger.info(f"Verifying signature for {docker_tag} with identity={cert_identity}, issuer={cert_oidc_issuer}")
 
-    # Use containerized cosign to avoid requiring local installation
+    # Use containerized cosign if cosign is not installed locally
     cosign_image = "chainguard/cosign:latest"
     container = None
 
     try:
-        docker_client = docker.from_env()
-
-        # Pull cosign image (small image, pull every time to ensure latest)
-        try:
-            docker_client.images.pull(cosign_image)
-        except docker.errors.APIError as e:
-            logger.warning(f"Could not pull {cosign_image}, using cached if available: {e}")
-
-        # Run cosign verify in container
-        # No Docker socket mount needed - cosign verifies against registry directly
-        # No ~/.cosign mount needed - using keyless OIDC verification via public Sigstore infrastructure
-        container = docker_client.containers.run(
-            cosign_image,
-            command=[
-                "verify",
-                docker_tag,
-                "--certificate-identity", cert_identity,
-                "--certificate-oidc-issuer", cert_oidc_issuer,
-            ],
-            remove=False,  # Keep container to retrieve logs on failure
-            detach=True,
-        )
+        docker_client = get_docker_client()
+
+        # Skip the verification if the same image has already been verified for this identity recently. Otherwise,
+        # verify the local image by its digest, so the cached result belongs to the image that is actually run.
+        digest = get_image_digest(docker_client, docker_tag)
+        cache_key = (digest or "", cert_identity, cert_oidc_issuer)
+        if digest and cache_key in docker_signature_cache:
+            if (datetime.now() - docker_signature_cache[cache_key]).total_seconds() < signature_cache_ttl:
+                logger.info(f"Signature of {docker_tag} ({digest}) already verified")
+                return True
+            del docker_signature_cache[cache_key]
+
+        cosign_arguments = [
+            "verify",
+            digest or docker_tag,
+            "--certificate-identity", cert_identity,
+            "--certificate-oidc-issuer", cert_oidc_issuer,
+        ]
+
+        cosign_binary = shutil.which("cosign")
+        if cosign_binary:
+            # Run the installed cosign directly, which saves pulling, starting and removing the cosign container
+            completed = subprocess.run([cosign_binary, *cosign_arguments], capture_output=True, timeout=60)
+            status_code = completed.returncode
+            logs = (completed.stdout + completed.stderr).decode('utf-8', errors='replace')
+        else:
+            # Pull cosign image (small image, but only checked for updates once per day)
+            if (datetime.now() - docker_pull_throttle.get(cosign_image, datetime.min)).total_seconds() > 86400:
+                try:
+                    docker_client.images.pull(cosign_image)
+                    docker_pull_throttle[cosign_image] = datetime.now()
+                except docker.errors.APIError as e:
+                    logger.warning(f"Could not pull {cosign_image}, using cached if available: {e}")
+
+            # Run cosign verify in container
+            # No Docker socket mount needed - cosign verifies against registry directly
+            # No ~/.cosign mount needed - using keyless OIDC verification via public Sigstore infrastructure
+            container = docker_client.containers.run(
+                cosign_image,
+                command=cosign_arguments,
+                remove=False,  # Keep container to retrieve logs on failure
+                detach=True,
+            )
 
-        # Wait for verification with timeout (transparency log checks can be slow)
-        result = container.wait(timeout=60)
-        logs = container.logs().decode('utf-8')
+            # Wait for verification with timeout (transparency log checks can be slow)
+            result = container.wait(timeout=60)
+            status_code = result['StatusCode']
+            logs = container.logs().decode('utf-8')
 
-        if result['StatusCode'] == 0:
+        if status_code == 0:
             logger.info(f"✓ Signature verification PASSED for {docker_tag}")
             logger.debug(f"Cosign output: {logs}")
+            if digest:
+                docker_signature_cache[cache_key] = datetime.now()
             return True
         else:
             logger.error(f"✗ Signature verification FAILED for {docker_tag}")
@@ -184,9 +290,71 @@ def verify_container_signature(docker_tag: str, module: Module) -> bool:
                 pass  # Best effort cleanup
 
 
+# Results of the MONAI probe, keyed by image id. The id is the hash of the image content, so entries never go stale.
+monai_command_cache: Dict[str, Optional[Dict]] = {}
+
+
+def get_monai_command(docker_client: docker.DockerClient, docker_tag: str) -> Optional[Dict]:
+    """Returns the entrypoint and command from the app manifest if the image is a MONAI MAP, None otherwise."""
+    try:
+        image_id: Optional[str] = docker_client.images.get(docker_tag).id
+    except Exception:
+        image_id = None
+    if image_id in monai_command_cache:
+        return monai_command_cache[image_id]
+
+    try:
+        monai_app_manifest = json.loads(docker_client.containers.run(docker_tag,
+                                                                     command="cat /etc/monai/app.json",
+                                                                     entrypoint="", remove=True).decode('utf-8'))
+        monai_command: Optional[Dict] = dict(entrypoint="", command=monai_app_manifest["command"])
+    except docker.errors.ContainerError:
+        monai_command = None
+    except docker.errors.NotFound:
+        raise Exception(f"Docker tag {docker_tag} not found, aborting.") from None
+    except (json.decoder.JSONDecodeError, KeyError):
+        raise Exception("Failed to parse MONAI app manifest.")
+
+    if image_id:
+        monai_command_cache[image_id] = monai_command
+    return monai_command
+
+
+def stream_container_logs(container: Any, live_log_file: Path, keep_logs: bool) -> str:
+    """
+    Writes the log output of the container to the live log file and the mercure log while the container is running.
+    Returns the complete logs if keep_logs is set, so they can be sent to the bookkeeper afterwards.
+    """
+    collected_logs = []
+    # Decode incrementally, as a chunk may end in the middle of a multi-byte character
+    log_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        with open(live_log_file, "w", encoding="utf-8") as log_file:
+            for log_chunk in container.logs(stream=True, follow=True, timestamps=True):
+                line = log_decoder.decode(log_chunk)
+                if not line:
+                    continue
+                localized_line = helper.localize_log_timestamps(line, config)
+                if keep_logs:
+                    collected_logs.append(localized_line)
+                # Write to file immediately for real-time access
+                log_file.write(localized_line)
+                log_file.flush()
+                # Also log to mercure logger
+                logger.info(localized_line.rstrip())
+    except Exception as e:
+        logger.warning(f"Error streaming logs: {e}")
+    return "".join(collected_logs)
+
+
 async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_processing: TaskProcessing) -> bool:
-    # Configure Docker client with extended timeout for resilient registry operations
-    docker_client = docker.from_env()  # type: ignore  # NOTE: 60 second timeout may not be enough for large images
+    global docker_prune_time
+
+    docker_client = get_docker_client()
+    # The docker calls block until the daemon has answered, so they are run in the executor of the event loop
+    loop = asyncio.get_running_loop()
+    # The ids of the processor, which the inputs and outputs of the module are assigned to
+    uid, gid, egid = os.getuid(), os.getgid(), os.getegid()
 
     if not task.process:
         return False
@@ -197,8 +365,8 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
         if not json_string:
             return {}
         try:
-            return json.loads(json_string)
-        except json.decoder.JSONDecodeError:
+            return orjson.loads(json_string)
+        except orjson.JSONDecodeError:
             logger.error(f"Unable to convert JSON string {json_string}")
             return {}
 
@@ -207,7 +375,8 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
     if helper.get_runner() == "docker":
         # We want to bind the correct path into the processor, but if we're inside docker we need to use the host path
         try:
-            base_path = Path(docker_client.api.inspect_volume("mercure_data")["Options"]["device"])
+            volume = await loop.run_in_executor(None, docker_client.api.inspect_volume, "mercure_data")
+            base_path = Path(volume["Options"]["device"])
         except Exception:
             base_path = Path("/opt/mercure/data")
             logger.error(f"Unable to find volume 'mercure_data'; assuming data directory is {base_path}")
@@ -296,24 +465,6 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
             logger.error(f"Persistence folder {mount_source} not found.")
             return False
 
-    set_command = {}
-    image_is_monai_map = False
-    try:
-        monai_app_manifest = json.loads(docker_client.containers.run(docker_tag,
-                                                                     command="cat /etc/monai/app.json",
-                                                                     entrypoint="", remove=True).decode('utf-8'))
-        image_is_monai_map = True
-        set_command = dict(entrypoint="", command=monai_app_manifest["command"])
-        logger.debug("Detected MONAI MAP, using command from manifest.")
-    except docker.errors.ContainerError:
-        pass
-    except docker.errors.NotFound:
-        raise Exception(f"Docker tag {docker_tag} not found, aborting.") from None
-    except (json.decoder.JSONDecodeError, KeyError):
-        raise Exception("Failed to parse MONAI app manifest.")
-
-    module.requires_root = module.requires_root or image_is_monai_map
-
     # Merge the two dictionaries
 
     # Determine if Docker Hub should be checked for new module version (only once per hour)
@@ -324,45 +475,37 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
         if timediff.total_seconds() < 3600:
             perform_image_update = False
 
+    # Skip the pull if the registry still serves the image that is already available locally
+    if perform_image_update and (
+        current_digest := await loop.run_in_executor(None, get_up_to_date_digest, docker_client, docker_tag)
+    ):
+        docker_pull_throttle[docker_tag] = datetime.now()
+        logger.info(f"Docker image {docker_tag} is up to date, using DIGEST {current_digest}")
+        perform_image_update = False
+
     # Get the latest image from Docker Hub
     if perform_image_update:
-        pull_start_time = datetime.now()
+        pull_start_time = time.monotonic()
 
         # Parse docker tag to extract registry, repository, and tag
         # Format: [registry/]repository[:tag|@digest]
-        tag_parts = docker_tag.split('/')
-        if len(tag_parts) == 1:
+        repository_name, tag_or_digest = docker.utils.parse_repository_tag(docker_tag)
+        registry_endpoint, repository = docker.auth.resolve_repository_name(repository_name)
+        if registry_endpoint == docker.auth.INDEX_NAME:
             # No registry specified, defaults to Docker Hub
             registry_endpoint = "registry-1.docker.io"
-            repository_path = tag_parts[0]
-        elif '.' in tag_parts[0] or ':' in tag_parts[0]:
-            # First part contains registry (has . or :)
-            registry_endpoint = tag_parts[0]
-            repository_path = '/'.join(tag_parts[1:])
-        else:
-            # Docker Hub with namespace (e.g., micsi/mercure-module)
-            registry_endpoint = "registry-1.docker.io"
-            repository_path = docker_tag
-
-        # Extract tag or digest
-        if '@' in repository_path:
-            repository, digest = repository_path.rsplit('@', 1)
-            tag = None
-        elif ':' in repository_path:
-            repository, tag = repository_path.rsplit(':', 1)
-            digest = None
+        if '@' in docker_tag:
+            tag, digest = None, tag_or_digest
         else:
-            repository = repository_path
-            tag = "latest"
-            digest = None
+            tag, digest = tag_or_digest or "latest", None
 
         try:
             docker_pull_throttle[docker_tag] = datetime.now()
             logger.info("Checking for update of docker image " + docker_tag + " ...")
-            pulled_image = docker_client.images.pull(docker_tag)
+            pulled_image = await loop.run_in_executor(None, docker_client.images.pull, docker_tag)
 
             # Measure and log pull duration
-            pull_duration = (datetime.now() - pull_start_time).total_seconds()
+            pull_duration = time.monotonic() - pull_start_time
             pull_timestamp = datetime.now().isoformat()
 
             if pulled_image is not None:
@@ -397,13 +540,17 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
             else:
                 logger.info(f"Image pull completed in {pull_duration:.1f}s")
 
-            # Clean dangling container images, which occur when the :latest image has been replaced
-            prune_result = docker_client.images.prune(filters={"dangling": True})
-            logger.info(prune_result)
+            # Clean dangling container images, which occur when the :latest image has been replaced. Pruning walks
+            # all images of the host, so it is done at most every six hours.
+            if docker_prune_time is None or (datetime.now() - docker_prune_time).total_seconds() > 21600:
+                docker_prune_time = datetime.now()
+                prune_result = await loop.run_in_executor(None, functools.partial(
+                    docker_client.images.prune, filters={"dangling": True}))
+                logger.info(prune_result)
             logger.info("Update done")
         except docker.errors.APIError as e:  # type: ignore
             # Network/registry connectivity issues - will use cached image
-            pull_duration = (datetime.now() - pull_start_time).total_seconds()
+            pull_duration = time.monotonic() - pull_start_time
             pull_timestamp = datetime.now().isoformat()
 
             # Log FAILED download attempt with full provenance
@@ -422,7 +569,7 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
             logger.warning(f"Registry unavailable for {docker_tag} after {pull_duration:.1f}s, using cached image: {str(e)}")
         except docker.errors.NotFound:  # type: ignore
             # Image doesn't exist in registry (likely local/unpublished image)
-            pull_duration = (datetime.now() - pull_start_time).total_seconds()
+            pull_duration = time.monotonic() - pull_start_time
             pull_timestamp = datetime.now().isoformat()
 
             # Log NOT FOUND with provenance
@@ -440,7 +587,7 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
             logger.info(f"Image {docker_tag} not found in registry after {pull_duration:.1f}s (this is normal for local/unpublished modules)")
         except Exception as e:
             # Catch-all for other issues
-            pull_duration = (datetime.now() - pull_start_time).total_seconds()
+            pull_duration = time.monotonic() - pull_start_time
             pull_timestamp = datetime.now().isoformat()
 
             # Log generic FAILURE with provenance
@@ -458,11 +605,25 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
             )
             logger.info(f"Couldn't check for module update after {pull_duration:.1f}s: {str(e)}")
 
+    # Both the signature check and the MONAI probe need the updated image, but they are independent of each other
+    signature_verified, monai_command = await asyncio.gather(
+        loop.run_in_executor(None, verify_container_signature, docker_tag, module),
+        loop.run_in_executor(None, get_monai_command, docker_client, docker_tag),
+    )
+
     # Verify container signature if required
-    if not verify_container_signature(docker_tag, module):
+    if not signature_verified:
         logger.error(f"Container signature verification failed for {docker_tag}. Aborting processing.", task.id)
         return False
 
+    set_command = {}
+    image_is_monai_map = False
+    if monai_command is not None:
+        set_command = monai_command
+        image_is_monai_map = True
+        logger.debug("Detected MONAI MAP, using command from manifest.")
+    module.requires_root = module.requires_root or image_is_monai_map
+
     # Run the container and handle errors of running the container
     processing_success = True
     container = None
@@ -489,8 +650,8 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
         # non-detached mode, the log output is gone before it can be printed from the exception)
 
         user_info = dict(
-            user=f"{os.getuid()}:{os.getegid()}",
-            group_add=[os.getgid()]
+            user=f"{uid}:{egid}",
+            group_add=[gid]
         )
         if module.requires_root:
             if not config.mercure.support_root_modules:
@@ -545,19 +706,24 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
         # The container runs as the same UID:GID as the processor (mercure user).
         try:
             # Ensure correct ownership and group-writable permissions
-            os.chown(folder / "in", os.getuid(), os.getgid())
+            os.chown(folder / "in", uid, gid)
             (folder / "in").chmod(0o770)
-            for k in (real_folder / "in").glob("**/*"):
-                os.chown(k, os.getuid(), os.getgid())
-                k.chmod(0o660)
+            for root, dirs, files in os.walk(folder / "in"):
+                for name in dirs:
+                    os.chown(os.path.join(root, name), uid, gid)
+                    os.chmod(os.path.join(root, name), 0o770)
+                for name in files:
+                    os.chown(os.path.join(root, name), uid, gid)
+                    os.chmod(os.path.join(root, name), 0o660)
         except PermissionError:
             raise Exception("Unable to prepare input files for processor. "
                             "The receiver may be running as root, which is no longer supported. ")
 
-        os.chown(folder / "out", os.getuid(), os.getgid())
+        os.chown(folder / "out", uid, gid)
         (folder / "out").chmod(0o770)
 
-        container = docker_client.containers.run(
+        container = await loop.run_in_executor(None, functools.partial(
+            docker_client.containers.run,
             docker_tag,
             mounts=default_mounts,
             volumes=additional_volumes,
@@ -569,34 +735,21 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
             **network_config,
             **security_config,
             detach=True,
-        )
+        ))
 
         # Stream logs in real-time to a file for live viewing
         live_log_file = folder / "process.log"
-        collected_logs = []
         logger.info("=== MODULE OUTPUT - BEGIN (streaming) ========================================")
-        try:
-            with open(live_log_file, "w", encoding="utf-8") as log_file:
-                for log_chunk in container.logs(stream=True, follow=True, timestamps=True):
-                    line = log_chunk.decode("utf-8")
-                    localized_line = helper.localize_log_timestamps(line, config)
-                    collected_logs.append(localized_line)
-                    # Write to file immediately for real-time access
-                    log_file.write(localized_line)
-                    log_file.flush()
-                    # Also log to mercure logger
-                    logger.info(localized_line.rstrip())
-        except Exception as e:
-            logger.warning(f"Error streaming logs: {e}")
+        logs = await loop.run_in_executor(None, stream_container_logs, container, live_log_file,
+                                          not config.mercure.processing_logs.discard_logs)
 
         # Get container exit status
-        docker_result = container.wait()
+        docker_result = await loop.run_in_executor(None, container.wait)
         logger.info(docker_result)
         logger.info("=== MODULE OUTPUT - END ==========================================")
 
         # Send final logs to bookkeeper
-        logs = "".join(collected_logs)
-        if logs and not config.mercure.processing_logs.discard_logs:
+        if logs:
             monitor.send_process_logs(task.id, task_processing.module_name, logs)
 
         # Clean up live log file
@@ -606,44 +759,53 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
             pass
 
         # In lieu of making mercure a sudoer...
-        logger.debug("Changing the ownership of the output directory...")
+        # Without user namespace remapping, a module that runs as our uid on the host has already created its output
+        # files with the right owner, so the ownership only needs to be changed for root modules or remapped users.
         try:
-            if (datetime.now() - docker_pull_throttle.get("busybox:stable-musl",
-                                                          datetime.fromisocalendar(1, 1, 1))
-                ).total_seconds() > 86400:  # noqa: 125
-                docker_client.images.pull("busybox:stable-musl")  # noqa: E117
-                docker_pull_throttle["busybox:stable-musl"] = datetime.now()
+            output_needs_chown = (module.requires_root or helper.get_runner() == "docker"
+                                  or docker_userns_remap_enabled())
         except Exception:
-            logger.exception("could not pull busybox")
-
-        if helper.get_runner() != "docker":
-            # We need to set the owner to the "real", unremapped mercure user
-            # that lives outside of the container, ie our actual uid.
-            # If docker isn't in usrns remap mode then this shouldn't have an effect.
-            set_usrns_mode = {"userns_mode": "host"}
+            output_needs_chown = True
+        if not output_needs_chown:
+            logger.debug("Output directory is already owned by the processor user")
         else:
-            # We're running inside docker, so we need to set the owner to our actual uid inside
-            # this container (probably 1000), not the one outside.
-            # If docker is in userns remap mode then this will get mapped, which is what we want.
-            set_usrns_mode = {}
-        docker_client.containers.run(
-            "busybox:stable-musl",
-            mounts=default_mounts,
-            **set_usrns_mode,
-            command=f"chown -R {os.getuid()}:{os.getegid()} {container_out_dir}",
-            detach=False
-        )
+            logger.debug("Changing the ownership of the output directory...")
+            try:
+                if (datetime.now() - docker_pull_throttle.get("busybox:stable-musl",
+                                                              datetime.fromisocalendar(1, 1, 1))
+                    ).total_seconds() > 86400:  # noqa: 125
+                    await loop.run_in_executor(None, docker_client.images.pull, "busybox:stable-musl")  # noqa: E117
+                    docker_pull_throttle["busybox:stable-musl"] = datetime.now()
+            except Exception:
+                logger.exception("could not pull busybox")
+
+            if helper.get_runner() != "docker":
+                # We need to set the owner to the "real", unremapped mercure user
+                # that lives outside of the container, ie our actual uid.
+                # If docker isn't in usrns remap mode then this shouldn't have an effect.
+                set_usrns_mode = {"userns_mode": "host"}
+            else:
+                # We're running inside docker, so we need to set the owner to our actual uid inside
+                # this container (probably 1000), not the one outside.
+                # If docker is in userns remap mode then this will get mapped, which is what we want.
+                set_usrns_mode = {}
+            await loop.run_in_executor(None, functools.partial(
+                docker_client.containers.run,
+                "busybox:stable-musl",
+                mounts=default_mounts,
+                **set_usrns_mode,
+                command=f"chown -R {uid}:{egid} {container_out_dir}",
+                detach=False
+            ))
 
         # Reset the permissions to owner rwx, world readonly.
         try:
             (folder / "out").chmod(0o755)
-            for k in (folder / "out").glob("**/*"):
-                if k.is_dir():
-                    k.chmod(0o755)
-
-            for k in (folder / "out").glob("**/*"):
-                if k.is_file():
-                    k.chmod(0o644)
+            for root, dirs, files in os.walk(folder / "out"):
+                for name in dirs:
+                    os.chmod(os.path.join(root, name), 0o755)
+                for name in files:
+                    os.chmod(os.path.join(root, name), 0o644)
         except Exception as e:
             logger.exception("Unable to set permissions on output files, manually verify to avoid issues. " + str(e))
 
@@ -672,7 +834,7 @@ async def docker_runtime(task: Task, folder: Path, file_count_begin: int, task_p
     finally:
         if container:
             # Remove the container now to avoid that the drive gets full
-            container.remove()
+            await loop.run_in_executor(None, container.remove)
 
     if module.requires_persistence:
         if persistence_lock_file and persistence_lock_file.exists():
@@ -694,6 +856,12 @@ async def process_series(folder: Path) -> None:
     lock_file = folder / mercure_names.PROCESSING
     lock = None
     task: Optional[Task] = None
+    # Processing steps of the task, also given as list if the task has a single step
+    process_list: List[TaskProcessing] = []
+    # Id from the task file, kept for the error reporting in case the task itself cannot be parsed
+    taskfile_id: Optional[str] = None
+    # Copying, moving and removing the files of a case can take a while, so it is done in the executor
+    loop = asyncio.get_running_loop()
     taskfile_path = folder / mercure_names.TASKFILE
     outputs = []
 
@@ -720,15 +888,22 @@ async def process_series(folder: Path) -> None:
             logger.error(f"Task file {taskfile_path} does not exist")
             raise Exception(f"Task file {taskfile_path} does not exist")
 
-        with open(taskfile_path, "r") as f:
-            task = Task(**json.load(f))
+        task_dict = orjson.loads(taskfile_path.read_bytes())
+        if isinstance(task_dict, dict):
+            taskfile_id = task_dict.get("id")
+        task = Task(**task_dict)
         logger.setTask(task.id)
+        multiple_steps = isinstance(task.process, list)
+        if multiple_steps:
+            process_list = cast(List[TaskProcessing], task.process)
+        elif task.process:
+            process_list = [cast(TaskProcessing, task.process)]
         if task.dispatch:
             needs_dispatching = True
 
         # Remember the number of incoming DCM files (for logging purpose)
-        # Use rglob for robustness (patient-level tasks are flattened before reaching here)
-        file_count_begin = len(list(folder.rglob(mercure_names.DCMFILTER)))
+        # Count recursively for robustness (patient-level tasks are flattened before reaching here)
+        file_count_begin = count_dcm_files(folder)
 
         (folder / "in").mkdir()
         for child in folder.iterdir():
@@ -754,25 +929,26 @@ async def process_series(folder: Path) -> None:
                 monitor.task_event.PROCESS_BEGIN,
                 task.id,
                 file_count_begin,
-                (task.process[0].module_name if isinstance(task.process, list)
-                 else task.process.module_name)
-                if task.process else "UNKNOWN",
+                process_list[0].module_name if process_list else "UNKNOWN",
                 "Processing job running",
             )
         # There are multiple processing steps
-        if runtime == docker_runtime and isinstance(task.process, list):
-            if task.process[0].retain_input_images:  # Keep a copy of the input files
-                shutil.copytree(folder / "in", folder / "input_files")
-            logger.info("==== TASK ====", task.dict())
-            copied_task = task.copy(deep=True)
+        if runtime == docker_runtime and multiple_steps:
+            if process_list[0].retain_input_images:  # Keep a copy of the input files
+                await loop.run_in_executor(None, shutil.copytree, folder / "in", folder / "input_files")
+            # The task is only serialized once, as the steps differ only in their processing information
+            step_task = task.dict()
+            logger.info("==== TASK ====", step_task)
+            # The inputs of the finished steps are removed in the background while the next steps run
+            input_removals: List[asyncio.Future] = []
             try:
-                for i, task_processing in enumerate(task.process):
+                for i, task_processing in enumerate(process_list):
                     # As far as the processing step is concerned, theres' only one processing step and it's this one,
                     # so we copy this one's information into a copy of the task file and hand that to the container.
-                    copied_task.process = task_processing
+                    step_task["process"] = task_processing.dict()
 
-                    with open(folder / "in" / mercure_names.TASKFILE, "w") as task_file:
-                        json.dump(copied_task.dict(), task_file)
+                    with open(folder / "in" / mercure_names.TASKFILE, "wb") as task_file:
+                        task_file.write(orjson.dumps(step_task, option=orjson.OPT_NON_STR_KEYS))
 
                     processing_success = await docker_runtime(task, folder, file_count_begin, task_processing)
                     if not processing_success:
@@ -780,23 +956,26 @@ async def process_series(folder: Path) -> None:
                     output = handle_processor_output(task, task_processing, i, folder)
                     outputs.append((task_processing.module_name, output))
                     (folder / "out" / "result.json").unlink(missing_ok=True)
-                    shutil.rmtree(folder / "in")
-                    if i < len(task.process) - 1:  # Move the results of the processing step to the input folder of the next
+                    used_input_folder = folder / f"in_step_{i}"
+                    (folder / "in").rename(used_input_folder)
+                    # Leftovers of a failed removal go with the rest of the case folder once the case is finished
+                    input_removals.append(loop.run_in_executor(
+                        None, functools.partial(shutil.rmtree, used_input_folder, ignore_errors=True)
+                    ))
+                    if i < len(process_list) - 1:  # Move the results of the processing step to the input folder of the next
                         (folder / "out").rename(folder / "in")
                         (folder / "out").mkdir()
                     task_processing.output = output
                 # Done all steps
-                if task.process[0].retain_input_images:
+                if process_list[0].retain_input_images:
                     (folder / "input_files").rename(folder / "in")
                 if outputs:
-                    with open(folder / "out" / "result.json", "w") as fp:
-                        json.dump(outputs, fp, indent=4)
+                    write_json_file(folder / "out" / "result.json", outputs)
 
             finally:
-                with open(folder / "out" / mercure_names.TASKFILE, "w") as task_file:
-                    #  logger.warning(f"DUMPING to {folder / 'out' / mercure_names.TASKFILE} TASK {task=}")
-                    json.dump(task.dict(), task_file, indent=4)
-        elif isinstance(task.process, list):
+                await asyncio.gather(*input_removals)
+                write_json_file(folder / "out" / mercure_names.TASKFILE, task.dict())
+        elif multiple_steps:
             raise Exception("Multiple processing steps are only supported on the Docker runtime.")
         else:
             task_process = cast(TaskProcessing, task.process)
@@ -804,20 +983,11 @@ async def process_series(folder: Path) -> None:
             if processing_success:
                 output = handle_processor_output(task, task_process, 0, folder)
                 task.process.output = output  # type: ignore
-                with open(folder / "out" / mercure_names.TASKFILE, "w") as fp:
-                    # logger.warning(f"DUMPING to {folder / 'out' / mercure_names.TASKFILE} TASK {task=}")
-                    json.dump(task.dict(), fp, indent=4)
+                write_json_file(folder / "out" / mercure_names.TASKFILE, task.dict())
                 outputs.append((task_process.module_name, output))
     except Exception:
         processing_success = False
-        task_id = None
-        if task is not None:
-            task_id = task.id
-        else:
-            try:
-                task_id = json.load(open(taskfile_path, "r"))["id"]
-            except Exception:
-                pass
+        task_id = task.id if task is not None else taskfile_id
         logger.error("Processing error.", task_id)  # handle_error
     finally:
         if task is not None:
@@ -827,19 +997,18 @@ async def process_series(folder: Path) -> None:
         if helper.get_runner() in ("docker", "systemd") and config.mercure.process_runner != "nomad":
             logger.info("Docker processing complete")
             # Copy the task to the output folder (in case the module didn't move it)
-            push_input_task(folder / "in", folder / "out")
+            push_input_task(folder / "in", folder / "out", task.id if task is not None else taskfile_id)
             # If configured in the rule, copy the input images to the output folder
-            if (task is not None
-                    and task.process
-                    and (task.process[0] if isinstance(task.process, list) else task.process).retain_input_images is True):
-                push_input_images(task_id, folder / "in", folder / "out")
+            if process_list and process_list[0].retain_input_images is True:
+                await loop.run_in_executor(None, push_input_images, task_id, folder / "in", folder / "out")
             # Remember the number of DCM files in the output folder (for logging purpose)
-            # Use rglob to recursively count files at any level
-            file_count_complete = len(list((folder / "out").rglob(mercure_names.DCMFILTER)))
+            # Count recursively to include files at any level. The count is only reported for successful cases, so
+            # the output of failed cases, which can be large and incomplete, is not searched.
+            file_count_complete = count_dcm_files(folder / "out") if processing_success else 0
 
             # Push the results either to the success or error folder
-            move_results(task_id, folder, lock, processing_success, needs_dispatching)
-            shutil.rmtree(folder, ignore_errors=True)
+            await loop.run_in_executor(None, move_results, task_id, folder, lock, processing_success, needs_dispatching)
+            await loop.run_in_executor(None, functools.partial(shutil.rmtree, folder, ignore_errors=True))
 
             if processing_success:
                 monitor.send_task_event(
@@ -870,36 +1039,100 @@ async def process_series(folder: Path) -> None:
                 logger.info("Done submitting for processing")
             else:
                 logger.info("Unable to process task")
-                move_results(task_id, folder, lock, False, False)
+                await loop.run_in_executor(None, move_results, task_id, folder, lock, False, False)
                 monitor.send_task_event(monitor.task_event.ERROR, task_id, 0, "", "Unable to process task")
                 if task is not None:
                     trigger_notification(task, mercure_events.ERROR)
     return
 
 
-def push_input_task(input_folder: Path, output_folder: Path):
+def count_dcm_files(folder: Path) -> int:
+    """Returns the number of DICOM files in the folder and its subfolders."""
+    count = 0
+    pending = [str(folder)]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.endswith(mercure_names.DCM):
+                    count += 1
+    return count
+
+
+def write_json_file(path: Path, content: Any) -> None:
+    """
+    Writes the content as indented JSON file with a single write. orjson only supports indenting by two spaces, which
+    keeps the files readable for people looking into the case folders.
+    """
+    with open(path, "wb") as fp:
+        fp.write(orjson.dumps(content, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+
+
+def push_input_task(input_folder: Path, output_folder: Path, task_id: Optional[str] = None):
     task_json = output_folder / "task.json"
     if not task_json.exists():
+        # The task file is read once, so that its id is at hand if writing the copy fails.
+        # It is not hard linked, as the input task file is updated separately if the case fails.
+        task_data = None
         try:
-            shutil.copyfile(input_folder / "task.json", output_folder / "task.json")
+            task_data = (input_folder / "task.json").read_bytes()
+            task_json.write_bytes(task_data)
         except Exception:
-            try:
-                task_id = json.load(open(input_folder / "task.json", "r"))["id"]
-                logger.error(f"Error copying task file to outfolder {output_folder}", task_id)  # handle_error
-            except Exception:
-                logger.error(f"Error copying task file to outfolder {output_folder}", None)  # handle_error
+            if task_id is None and task_data is not None:
+                try:
+                    task_id = orjson.loads(task_data)["id"]
+                except Exception:
+                    pass
+            logger.error(f"Error copying task file to outfolder {output_folder}", task_id)  # handle_error
+
+
+def link_file(source: str, target: str) -> bool:
+    """
+    Hard links the file to the target, which needs no data to be copied. Returns False if the file cannot be linked,
+    e.g. if the target exists or is located on another file system. A linked file shares its permissions with the
+    input file, which the processing has restricted to the owner and group, so it is given the permissions of a copy
+    (rw-r--r--).
+    """
+    try:
+        os.link(source, target)
+    except OSError:
+        return False
+    os.chmod(target, 0o644)
+    return True
 
 
 def push_input_images(task_id: str, input_folder: Path, output_folder: Path):
     error_while_copying = False
-    for entry in os.scandir(input_folder):
-        if entry.name.endswith(mercure_names.DCM):
-            try:
-                shutil.copyfile(input_folder / entry.name, output_folder / entry.name)
-            except Exception:
-                logger.exception(f"Error copying file to outfolder {entry.name}")
-                error_while_copying = True
-                error_info = sys.exc_info()
+    with os.scandir(input_folder) as entries:
+        image_files = [entry.name for entry in entries if entry.name.endswith(mercure_names.DCM)]
+    files_to_copy = []
+    for name in image_files:
+        try:
+            if not link_file(os.path.join(input_folder, name), os.path.join(output_folder, name)):
+                files_to_copy.append(name)
+        except Exception:
+            logger.exception(f"Error copying file to outfolder {name}")
+            error_while_copying = True
+            error_info = sys.exc_info()
+    if files_to_copy:
+        # Files that cannot be linked are copied in parallel, as the copies mostly wait for the file system
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            copies = {
+                executor.submit(shutil.copyfile, os.path.join(input_folder, name), os.path.join(output_folder, name)): name
+                for name in files_to_copy
+            }
+            for copy in concurrent.futures.as_completed(copies):
+                try:
+                    copy.result()
+                except Exception:
+                    logger.exception(f"Error copying file to outfolder {copies[copy]}")
+                    error_while_copying = True
+                    error_info = sys.exc_info()
     if error_while_copying:
         logger.error(
             f"Error while copying files to output folder {output_folder}", task_id, exc_info=error_info
@@ -907,13 +1140,12 @@ def push_input_images(task_id: str, input_folder: Path, output_folder: Path):
 
 
 def handle_processor_output(task: Task, task_processing: TaskProcessing, index: int, folder: Path) -> Any:
-    output_file = folder / "out" / "result.json"
-    if not output_file.is_file():
+    try:
+        output = orjson.loads((folder / "out" / "result.json").read_bytes())
+    except (FileNotFoundError, IsADirectoryError):
         logger.info("No result.json")
         return
-    try:
-        output = json.loads(output_file.read_text())
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         # Not json
         logger.info("Failed to parse result.json")
         return
@@ -952,6 +1184,25 @@ def move_results(
             move_out_folder(task_id, folder, Path(config.mercure.success_folder))
 
 
+debug_listing_limit = 50
+
+
+def iter_folder_contents(folder: Path) -> Iterator[str]:
+    """Yields the paths of the entries below the folder, relative to the folder, while the folder is walked."""
+    stack = [""]
+    while stack:
+        relative_path = stack.pop()
+        try:
+            with os.scandir(folder / relative_path) as entries:
+                for entry in entries:
+                    entry_path = os.path.join(relative_path, entry.name)
+                    yield entry_path
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry_path)
+        except OSError:
+            continue
+
+
 def move_out_folder(task_id: str, source_folder: Path, destination_folder: Path, move_all=False, fail_stage=None) -> None:
     # source_folder = Path(source_folder_str)
     # destination_folder = Path(destination_folder_str)
@@ -962,10 +1213,12 @@ def move_out_folder(task_id: str, source_folder: Path, destination_folder: Path,
         target_folder = destination_folder / new_name
 
     logger.debug(f"Moving {source_folder} to {target_folder}, move_all: {move_all}")
-    logger.debug("--- source contents ---")
-    for k in source_folder.glob("**/*"):
-        logger.debug("{:>25}".format(str(k.relative_to(source_folder))))
-    logger.debug("--------------")
+    if logger.isEnabledFor(logging.DEBUG):
+        # The listing stops after a few entries, so that large cases neither flood the log nor have to be walked
+        logger.debug("--- source contents ---")
+        for k in itertools.islice(iter_folder_contents(source_folder), debug_listing_limit):
+            logger.debug("{:>25}".format(str(k)))
+        logger.debug("--------------")
     try:
         if move_all:
             shutil.move(str(source_folder), target_folder)
@@ -27,8 +27,8 @@ import graphyte
 import hupper
 from common.constants import mercure_defs, mercure_events, mercure_names
 from common.types import Task, TaskProcessing
-from process.process_series import (handle_processor_output, move_results, process_series, push_input_images, push_input_task,
-                                    trigger_notification)
+from process.process_series import (count_dcm_files, handle_processor_output, move_results, process_series, push_input_images,
+                                    push_input_task, trigger_notification)
 from process.status import is_ready_for_processing
 
 import nomad
@@ -152,8 +152,8 @@ async def search_folder(counter) -> bool:
             push_input_images(task.id, in_folder, out_folder)
 
         # Remember the number of DCM files in the output folder (for logging purpose)
-        # Use rglob to recursively count files at any level
-        file_count_complete = len(list(Path(out_folder).rglob(mercure_names.DCMFILTER)))
+        # Count recursively to include files at any level
+        file_count_complete = count_dcm_files(out_folder)
         handle_processor_output(task, task_processing, 0, p_folder)
 
         # If the only file is task.json, the processing failed
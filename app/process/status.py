@@ -5,24 +5,43 @@ Helper functions for mercure's processor module
 """
 
 # Standard python includes
-from pathlib import Path
+import os
+from typing import List
 
 # App-specific includes
 from common.constants import mercure_names
 
 
+def has_dicom_files(folders: List[str]) -> bool:
+    """Checks if the folders contain a DICOM file at any level. Stops searching at the first file found."""
+    pending = list(folders)
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.endswith(mercure_names.DCM) and entry.is_file():
+                    return True
+    return False
+
+
 def is_ready_for_processing(folder) -> bool:
     """Checks if a case in the processing folder is ready for the processor."""
     try:
-        path = Path(folder)
+        # The case folder is listed once for both the lock files and the DICOM files. The lock files are checked
+        # before the subfolders are searched, so that locked cases are not searched.
+        found_dicom = False
+        subfolders = []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name in (mercure_names.LOCK, mercure_names.PROCESSING):
+                    return False
+                if entry.is_dir(follow_symlinks=False):
+                    subfolders.append(entry.path)
+                elif entry.name.endswith(mercure_names.DCM) and entry.is_file():
+                    found_dicom = True
         # Check for DICOM files at any level (root or subdirectories for patient-level tasks)
-        has_dicom_files = len(list(path.rglob("*.dcm"))) > 0
-        folder_status = (
-            not (path / mercure_names.LOCK).exists()
-            and not (path / mercure_names.PROCESSING).exists()
-            and has_dicom_files
-        )
-        return folder_status
+        return found_dicom or has_dicom_files(subfolders)
     except Exception:
         # Capture exceptions that may be triggered if the folder has been removed
         # by another process in the meantime
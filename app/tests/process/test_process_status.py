@@ -0,0 +1,91 @@
+"""
+test_process_status.py
+======================
+"""
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from common.constants import mercure_names
+from process.process_series import count_dcm_files
+from process.status import is_ready_for_processing
+
+
+# "fs" is the reference to the fake file system
+
+
+@pytest.fixture
+def case(fs) -> Path:
+    folder = Path("/var/processing/case")
+    folder.mkdir(parents=True)
+    return folder
+
+
+def test_is_ready_for_processing(case):
+    (case / "a.dcm").touch()
+    (case / "task.json").touch()
+    assert is_ready_for_processing(case)
+
+
+def test_is_not_ready_for_processing_without_dicom_files(case):
+    (case / "task.json").touch()
+    (case / "empty").mkdir()
+    assert not is_ready_for_processing(case)
+
+
+@pytest.mark.parametrize("lock_name", [mercure_names.LOCK, mercure_names.PROCESSING])
+def test_is_not_ready_for_processing_while_locked(case, lock_name):
+    (case / "a.dcm").touch()
+    (case / lock_name).touch()
+    assert not is_ready_for_processing(case)
+
+
+def test_is_ready_for_processing_with_dicom_files_in_subfolder(case):
+    (case / "study" / "series").mkdir(parents=True)
+    (case / "study" / "series" / "a.dcm").touch()
+    (case / "task.json").touch()
+    assert is_ready_for_processing(case)
+    assert count_dcm_files(case) == 1
+
+
+def test_symlinked_folders_are_not_searched(case):
+    # Same as Path.rglob, which does not follow symlinks to directories
+    elsewhere = Path("/var/elsewhere")
+    elsewhere.mkdir()
+    (elsewhere / "a.dcm").touch()
+    (case / "linked").symlink_to(elsewhere)
+    (case / "loop").symlink_to(case)
+    assert not is_ready_for_processing(case)
+    assert count_dcm_files(case) == 0
+
+
+def test_folder_removed_during_scan(case, mocker):
+    (case / "series").mkdir()
+    (case / "series" / "a.dcm").touch()
+    (case / "b.dcm").touch()
+    scandir = os.scandir
+
+    def remove_then_scan(path):
+        # Another process removes the subfolder just before it is listed
+        if path == str(case / "series"):
+            shutil.rmtree(path)
+        return scandir(path)
+
+    mocker.patch("os.scandir", side_effect=remove_then_scan)
+    assert count_dcm_files(case) == 1
+    assert is_ready_for_processing(case)
+
+    shutil.rmtree(case)
+    assert not is_ready_for_processing(case)
+    assert count_dcm_files(case) == 0
+
+
+def test_count_dcm_files(case):
+    (case / "in").mkdir()
+    (case / "out" / "series").mkdir(parents=True)
+    for name in ("in/a.dcm", "out/b.dcm", "out/series/c.dcm", "out/series/c.tags", "d.dcm"):
+        (case / name).touch()
+    assert count_dcm_files(case) == 4
+    assert count_dcm_files(case / "out") == 2
+    assert count_dcm_files(case / "missing") == 0
@@ -0,0 +1,132 @@
+"""
+test_bookkeeper_helper.py
+=========================
+"""
+import datetime
+import decimal
+import json
+from typing import Any, AsyncIterator, List
+
+import pytest
+from bookkeeping.helper import CustomStreamingJSONResponse, TTLCache, dump_json
+
+
+def test_ttl_cache_expiry(mocker):
+    monotonic = mocker.patch("bookkeeping.helper.time.monotonic", return_value=1000.0)
+    cache: TTLCache[str] = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", "value")
+    monotonic.return_value = 1010.0
+    assert cache.get("a") == "value"
+    monotonic.return_value = 1010.5
+    assert cache.get("a") is None
+    assert "a" not in cache.entries
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache: TTLCache[int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache.entries) == 2
+
+
+def test_ttl_cache_pop():
+    cache: TTLCache[int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.pop("a")
+    assert cache.get("a") is None
+    # Entries that are not cached are ignored
+    cache.pop("missing")
+
+
+def test_dump_json_formats():
+    content = {
+        "time": datetime.datetime(2025, 2, 20, 9, 15, 42, 123456),
+        "date": datetime.date(2025, 2, 20),
+        "size": decimal.Decimal("1.5"),
+        1: "non-string key",
+    }
+    assert json.loads(dump_json(content)) == {
+        "time": "2025-02-20 09:15:42",
+        "date": "2025-02-20",
+        "size": 1.5,
+        "1": "non-string key",
+    }
+
+
+async def render(response: CustomStreamingJSONResponse) -> List[bytes]:
+    return [chunk async for chunk in response.body_iterator]  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_rows():
+    chunks = await render(CustomStreamingJSONResponse([{"a": 1}, {"b": datetime.date(2025, 2, 20)}]))
+    assert json.loads(b"".join(chunks)) == [{"a": 1}, {"b": "2025-02-20"}]
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_empty_rows():
+    assert b"".join(await render(CustomStreamingJSONResponse([]))) == b"[]"
+    assert json.loads(b"".join(await render(CustomStreamingJSONResponse([], {"draw": 1})))) == {"data": [], "draw": 1}
+    assert b"".join(await render(CustomStreamingJSONResponse([], {}))) == b'{"data":[]}'
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_envelope():
+    envelope: dict = {"draw": 3, "data": "replaced by the rows"}
+
+    async def rows() -> AsyncIterator[Any]:
+        yield {"id": 1}
+        yield {"id": 2}
+        # Entries of the envelope can still be set while the rows are produced
+        envelope["next_cursor"] = "abc"
+
+    body = b"".join(await render(CustomStreamingJSONResponse(rows(), envelope)))
+    # The rows are sent first, followed by the other entries of the envelope
+    assert body.startswith(b'{"data":[{"id":1},{"id":2}],')
+    assert json.loads(body) == {"data": [{"id": 1}, {"id": 2}], "draw": 3, "next_cursor": "abc"}
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_chunks(mocker):
+    mocker.patch.object(CustomStreamingJSONResponse, "chunk_size", 40)
+    rows = [{"value": "x" * 10} for _ in range(5)]
+    chunks = await render(CustomStreamingJSONResponse(rows))
+    # Each row takes 23 bytes with its separator, so a chunk is sent after every second row
+    assert [len(chunk) for chunk in chunks] == [46, 46, 24]
+    assert json.loads(b"".join(chunks)) == rows
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_start():
+    async def rows() -> AsyncIterator[Any]:
+        for i in range(3):
+            yield {"id": i}
+
+    response = await CustomStreamingJSONResponse.start(rows(), {"draw": 1})
+    assert json.loads(b"".join(await render(response))) == {"data": [{"id": 0}, {"id": 1}, {"id": 2}], "draw": 1}
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_start_empty_rows():
+    async def rows() -> AsyncIterator[Any]:
+        return
+        yield
+
+    assert b"".join(await render(await CustomStreamingJSONResponse.start(rows()))) == b"[]"
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_start_raises_query_errors():
+    async def rows() -> AsyncIterator[Any]:
+        raise RuntimeError("query failed")
+        yield
+
+    # The error is raised before the response exists, so no status has been sent yet
+    with pytest.raises(RuntimeError, match="query failed"):
+        await CustomStreamingJSONResponse.start(rows())
@@ -0,0 +1,205 @@
+"""
+test_bookkeeper_query.py
+========================
+"""
+import base64
+import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Tuple
+
+import databases
+import pydicom
+import pytest
+from bookkeeping.query import (convert_value, dataset_to_dict, decode_task_cursor, encode_task_cursor,
+                               fetch_records, find_task_folders, max_displayed_bytes)
+from bookkeeping.query import router as query_router
+from common import config
+from pydicom.dataset import Dataset
+from starlette.applications import Starlette
+from starlette.authentication import AuthCredentials, AuthenticationBackend, SimpleUser
+from starlette.middleware import Middleware
+from starlette.middleware.authentication import AuthenticationMiddleware
+from starlette.testclient import TestClient
+
+
+@pytest.mark.parametrize("vr,value,expected", [
+    ("DS", pydicom.valuerep.DSfloat("1.5"), 1.5),
+    ("IS", pydicom.valuerep.IS("3"), 3),
+    ("US", 512, 512),
+    ("PN", pydicom.valuerep.PersonName("Doe^John"), "Doe^John"),
+    ("CS", pydicom.multival.MultiValue(str, ["ORIGINAL", "PRIMARY"]), ["ORIGINAL", "PRIMARY"]),
+    ("UI", "1.2.840.10008.1.2.1", "Explicit VR Little Endian"),
+    ("LO", "", ""),
+    ("LO", None, None),
+])
+def test_convert_value_by_vr(vr, value, expected):
+    assert convert_value(vr, value) == expected
+
+
+def test_convert_value_printable_bytes():
+    assert convert_value("OB", b"ABC \x00") == "ABC"
+
+
+@pytest.mark.parametrize("value", [b"\xff\xfe\x80\x90", bytes(range(0x80, 0xA0)), b"\x01\x02\x03"])
+def test_convert_value_binary_bytes(value):
+    assert convert_value("OB", value) == base64.b64encode(value).decode("ascii")
+    assert convert_value("UN", value) == base64.b64encode(value).decode("ascii")
+
+
+def test_convert_value_large_bytes():
+    with pytest.raises(TypeError):
+        convert_value("OB", b"\x80" * (max_displayed_bytes + 1))
+
+
+def test_dataset_to_dict():
+    item = Dataset()
+    item.CodeValue = "123"
+    ds = Dataset()
+    ds.PatientName = "Doe^John"
+    ds.SliceThickness = "1.5"
+    ds.SeriesNumber = "3"
+    ds.ReferencedImageSequence = [item]
+    ds.add_new(0x00091001, "UN", b"\xff\xfe")
+    # Too large to be shown, falls back to the representation of pydicom
+    ds.add_new(0x00291010, "OB", b"\x80" * (max_displayed_bytes + 100))
+
+    assert dataset_to_dict(ds) == {
+        "PatientName": "Doe^John",
+        "SliceThickness": 1.5,
+        "SeriesNumber": 3,
+        "ReferencedImageSequence": [{"CodeValue": "123"}],
+        "0009,1001": "//4=",
+        "0029,1010": f"Array of {max_displayed_bytes + 100} elements",
+    }
+
+
+def test_dataset_to_dict_raw_elements():
+    ds = Dataset()
+    ds.PatientID = "MRN1"
+    ds.Rows = 512
+    ds.ImageType = ["ORIGINAL", "PRIMARY"]
+    ds.is_little_endian = True
+    ds.is_implicit_VR = False
+    buffer = BytesIO()
+    ds.save_as(buffer)
+    buffer.seek(0)
+
+    # The elements of a dataset that has been read are only decoded when they are converted
+    assert dataset_to_dict(pydicom.dcmread(buffer, force=True)) == {
+        "PatientID": "MRN1",
+        "Rows": 512,
+        "ImageType": ["ORIGINAL", "PRIMARY"],
+    }
+
+
+def test_task_cursor_round_trip():
+    time = datetime.datetime(2025, 2, 20, 9, 15, 42)
+    assert decode_task_cursor(encode_task_cursor(time, "task-1")) == (time, "task-1")
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", base64.urlsafe_b64encode(b"[1, 2, 3]").decode(),
+                                    base64.urlsafe_b64encode(b'["yesterday", "task-1"]').decode()])
+def test_invalid_task_cursor(cursor):
+    assert decode_task_cursor(cursor) is None
+
+
+class AllowAll(AuthenticationBackend):
+    async def authenticate(self, conn):
+        return AuthCredentials(["authenticated"]), SimpleUser("test")
+
+
+def run_find_task(mocker, rows, **query_params) -> Tuple[Dict, Dict]:
+    """Calls find_task with a database that returns the given rows, returns the response and the query parameters."""
+    executed = {}
+
+    async def iterate(query):
+        executed.update(query.compile().params)
+        for row in rows:
+            yield row
+
+    mocker.patch("bookkeeping.database.database", create=True, fetch_one=mocker.AsyncMock(return_value={"total_count": 5}),
+                 iterate=iterate)
+    app = Starlette(routes=query_router, middleware=[Middleware(AuthenticationMiddleware, backend=AllowAll())])
+    response = TestClient(app).get("/find_task", params=query_params)
+    assert response.status_code == 200
+    return response.json(), executed
+
+
+def test_find_task_query_error(mocker):
+    async def iterate(query):
+        raise RuntimeError("query failed")
+        yield
+
+    mocker.patch("bookkeeping.database.database", create=True, fetch_one=mocker.AsyncMock(return_value={"total_count": 5}),
+                 iterate=iterate)
+    app = Starlette(routes=query_router, middleware=[Middleware(AuthenticationMiddleware, backend=AllowAll())])
+    response = TestClient(app, raise_server_exceptions=False).get("/find_task")
+    # The error of the query is not hidden behind an incomplete response with status 200
+    assert response.status_code == 500
+
+
+def task_row(task_id: str, time: datetime.datetime) -> Dict:
+    return {"task_id": task_id, "time": time, "acc": "", "mrn": "", "scope": "patient", "rule": "",
+            "study_uid": "", "series_uid": "", "series_description": "", "modality": "", "child_count": 0}
+
+
+def test_find_task_next_cursor(mocker):
+    times = [datetime.datetime(2025, 2, 20, 9, 15, 42 - i) for i in range(2)]
+    response, executed = run_find_task(mocker, [task_row(f"task-{i}", time) for i, time in enumerate(times)],
+                                       length="2")
+
+    assert [row["task_id"] for row in response["data"]] == ["task-0", "task-1"]
+    assert response["recordsTotal"] == 5
+    assert decode_task_cursor(response["next_cursor"]) == (times[1], "task-1")
+    assert "cursor_time" not in executed
+
+
+def test_find_task_last_page_has_no_cursor(mocker):
+    response, _ = run_find_task(mocker, [task_row("task-0", datetime.datetime(2025, 2, 20))], length="2")
+    assert "next_cursor" not in response
+
+
+def test_find_task_continues_after_cursor(mocker):
+    cursor = encode_task_cursor(datetime.datetime(2025, 2, 20, 9, 15, 42), "task-1")
+    _, executed = run_find_task(mocker, [], length="2", start="20", cursor=cursor)
+    assert executed["cursor_time"] == datetime.datetime(2025, 2, 20, 9, 15, 42)
+    assert executed["cursor_id"] == "task-1"
+    assert executed["start"] == 0
+
+
+def test_find_task_cursor_requires_time_order(mocker):
+    cursor = encode_task_cursor(datetime.datetime(2025, 2, 20, 9, 15, 42), "task-1")
+    response, executed = run_find_task(mocker, [task_row("task-0", datetime.datetime(2025, 2, 20))] * 2,
+                                       **{"length": "2", "start": "20", "cursor": cursor, "order[0][column]": "1"})
+    # Pages that are not ordered by time are selected by offset
+    assert "cursor_time" not in executed
+    assert executed["start"] == 20
+    assert "next_cursor" not in response
+
+
+@pytest.mark.asyncio
+async def test_fetch_records_without_asyncpg(mocker):
+    # All queries share the single connection of the in-memory database
+    database = databases.Database("sqlite:///:memory:", force_rollback=True)
+    mocker.patch("bookkeeping.database.database", database, create=True)
+    await database.connect()
+    try:
+        await database.execute("CREATE TABLE dicom_series (series_uid TEXT, tag_modality TEXT)")
+        await database.execute("INSERT INTO dicom_series VALUES ('1.2.3', 'CT'), ('1.2.4', 'MR')")
+        # The placeholders of asyncpg are bound as parameters of the other database backends
+        records = await fetch_records("SELECT tag_modality FROM dicom_series WHERE series_uid = $1", "1.2.4")
+        assert [dict(record._mapping) for record in records] == [{"tag_modality": "MR"}]
+        assert len(await fetch_records("SELECT * FROM dicom_series")) == 2
+    finally:
+        await database.disconnect()
+
+
+def test_find_task_folders(fs):
+    success_folder, error_folder = Path(config.mercure.success_folder), Path(config.mercure.error_folder)
+    (success_folder / "task-1").mkdir(parents=True, exist_ok=True)
+    (error_folder / "task-2").mkdir(parents=True, exist_ok=True)
+    assert find_task_folders(["task-1", "task-2", "task-3"]) == {
+        "task-1": success_folder / "task-1",
+        "task-2": error_folder / "task-2",
+    }
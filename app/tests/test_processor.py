@@ -262,6 +262,8 @@ async def test_process_series(fs, mercure_config: Callable[[Dict], Config], mock
     fake_run = mocked.Mock(return_value=FakeDockerContainer(),
                            side_effect=make_fake_processor(fs, mocked, False))  # type: ignore
     mocked.patch.object(ContainerCollection, "run", new=fake_run)
+    # The ownership of the output files is only changed if the users of the containers are remapped
+    mocked.patch("process.process_series.docker_userns_remap_enabled", return_value=True)
     await processor.run_processor()
 
     # processor_path = next(Path("/var/processing").iterdir())